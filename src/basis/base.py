@@ -14,8 +14,9 @@
 #  this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from enum import Enum
+from planck.src.helpers import tables
+import importlib
 import numpy
-import scipy.special
 
 class Shell_Type(Enum):
     """
@@ -65,10 +66,10 @@ class Shell:
     """
     def __init__(self, shell: list[int], exps: list[float], coeffs: list[float], center: list[float], is_Normalized: bool) -> None:
         self.shell        = numpy.array(shell)
-        self.exponents    = numpy.array(exponents)
-        self.coefficients = numpy.array(coefficients)
-        self.normcoeffs   = numpy.zeros(self.coefficients.size)
-        self.center       = numpy.array(center)
+        self.exponents    = numpy.array(exps, dtype = float)
+        self.coefficients = numpy.array(coeffs, dtype = float)
+        self.normcoeffs   = numpy.ones(self.coefficients.size)
+        self.center       = numpy.array(center, dtype = float)
         self.basisindex   = 0
         self.type         = Shell_Type(sum(self.shell))
         
@@ -90,8 +91,43 @@ class Shell:
         """
         _l, _m, _n = self.shell
         _total_moment = sum(self.shell)
-        _prefact_pgto = pow(2, 2*_total_moment) * pow(2, 1.5)/scipy.special.factorial2(2*_l-1)/scipy.special.factorial2(2*_m-1)/scipy.special.factorial2(2*_n-1)/pow(numpy.pi, 1.5)
         
-        self.normcoeffs = numpy.sqrt(pow(exponent, _total_moment) * pow(self.exponents, 1.5) * prefactorpGTO)
-        _prefact_cgto   = pow(numpy.pi, 1.5) * factorial2(2*_l - 1) * factorial2(2*_m - 1) * factorial2(2*_n - 1) / pow(2.0, _total_moment)
-        
\ No newline at end of file
+        # Double factorials from the precomputed table, with the argument clamped to get (-1)!! = 1
+        _dfact        = tables.load("double_factorials")
+        _dfact_prod   = _dfact[max(2*_l-1, 0)] * _dfact[max(2*_m-1, 0)] * _dfact[max(2*_n-1, 0)]
+        _prefact_pgto = pow(2, 2*_total_moment) * pow(2, 1.5)/_dfact_prod/pow(numpy.pi, 1.5)
+        
+        self.normcoeffs = numpy.sqrt(pow(self.exponents, _total_moment) * pow(self.exponents, 1.5) * _prefact_pgto)
+        _prefact_cgto   = pow(numpy.pi, 1.5) * _dfact_prod / pow(2.0, _total_moment)
+        
+        # Normalize the contraction so that the overlap of the contracted function with itself is one
+        _weights = self.coefficients * self.normcoeffs
+        _expsum  = self.exponents[:, None] + self.exponents[None, :]
+        _norm    = _prefact_cgto * numpy.sum(numpy.outer(_weights, _weights) / pow(_expsum, _total_moment + 1.5))
+        self.coefficients = self.coefficients / numpy.sqrt(_norm)
+
+def load_basis(atoms: list[str], coords: list[float], basis_sets: dict[str, str]) -> list[Shell]:
+    """
+    Builds the basis functions of a molecule from the tabulated basis sets.
+
+    The basis set of every element is looked up in the module `planck.src.basis.<name>`, where the data of
+    element X is stored in the dictionary X_<NAME>, e.g. H_STO_3G in `planck.src.basis.sto_3g`.
+
+    Args:
+    -----
+        atoms (list[str]): The atomic symbols of the molecule.
+        coords (list[float]): The atomic coordinates in angstrom, flattened as stored in `Molecule.coords`.
+        basis_sets (dict[str, str]): The name of the basis set used for every element, e.g. {"H": "sto-3g"}.
+
+    Returns:
+    --------
+        list[Shell]: The normalized basis functions, centered on the atoms in bohr.
+    """
+    _basis   = []
+    _centers = numpy.asarray(coords, dtype = float).reshape(-1, 3) * tables.ANGSTROM_TO_BOHR
+    for _atom, _center in zip(atoms, _centers):
+        _name   = basis_sets[_atom].lower().replace("-", "_")
+        _module = importlib.import_module(f"planck.src.basis.{_name}")
+        for _entry in getattr(_module, f"{_atom.upper()}_{_name.upper()}").values():
+            _basis.append(Shell(_entry["shell"], _entry["exponents"], _entry["coefficients"], _center, False))
+    return _basis
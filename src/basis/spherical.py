@@ -0,0 +1,179 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.basis.base import Shell
+import functools
+import math
+import numpy
+import typing
+
+def cartesian_components(momentum: int) -> list[tuple[int, int, int]]:
+    """
+    Returns the Cartesian exponents (l, m, n) of a shell in the canonical order.
+
+    The order is xx, xy, xz, yy, yz, zz for a d shell, i.e. decreasing powers of x and then of y.
+
+    Args:
+    -----
+        momentum (int): The total angular momentum of the shell.
+
+    Returns:
+    --------
+        list[tuple[int, int, int]]: The (momentum + 1)(momentum + 2)/2 Cartesian exponents.
+    """
+    return [(_l, _m, momentum - _l - _m) for _l in range(momentum, -1, -1) for _m in range(momentum - _l, -1, -1)]
+
+@functools.lru_cache(maxsize = None)
+def cart2sph(momentum: int) -> list[list[float]]:
+    """
+    Returns the matrix transforming normalized Cartesian functions into real solid harmonics.
+
+    The coefficients of the real solid harmonics S_lm in terms of Cartesian monomials are taken from
+    Helgaker, Jorgensen and Olsen, Molecular Electronic-Structure Theory, eq. (6.4.48). Since every Cartesian
+    component of a `Shell` is normalized on its own, each column is rescaled by the ratio of the
+    normalization of x^l to that of the component. The rows are ordered m = -l, ..., l. For s and p shells
+    the matrix is the identity, so p functions keep their x, y, z order.
+
+    Args:
+    -----
+        momentum (int): The total angular momentum of the shell.
+
+    Returns:
+    --------
+        numpy.ndarray: The transformation matrix with shape (2l + 1, (l + 1)(l + 2)/2).
+    """
+    _components = cartesian_components(momentum)
+    if momentum < 2:
+        return numpy.eye(len(_components))
+
+    _index  = {_component: _i for _i, _component in enumerate(_components)}
+    _matrix = numpy.zeros((2 * momentum + 1, len(_components)))
+    for _m in range(-momentum, momentum + 1):
+        _abs  = abs(_m)
+        _vm   = 0.0 if _m >= 0 else 0.5
+        _norm = math.sqrt(2 * math.factorial(momentum + _abs) * math.factorial(momentum - _abs) / (2.0 if _m == 0 else 1.0)) / (pow(2, _abs) * math.factorial(momentum))
+        for _t in range((momentum - _abs) // 2 + 1):
+            for _u in range(_t + 1):
+                # v runs over integers for m >= 0 and over half integers for m < 0
+                _v = _vm
+                while _v <= math.floor(_abs / 2 - _vm) + _vm:
+                    _coeff = pow(-1, int(_t + _v - _vm)) * pow(0.25, _t) * math.comb(momentum, _t) * math.comb(momentum - _t, _abs + _t) * math.comb(_t, _u) * math.comb(_abs, int(2 * _v))
+                    _power = (int(2 * _t + _abs - 2 * (_u + _v)), int(2 * (_u + _v)), momentum - 2 * _t - _abs)
+                    _matrix[_m + momentum, _index[_power]] += _norm * _coeff
+                    _v += 1.0
+
+    # Every Cartesian component carries its own normalization, convert to the normalization of x^l
+    _dfact = lambda n: float(math.prod(range(2 * n - 1, 0, -2)))
+    _scale = numpy.array([math.sqrt(_dfact(_l) * _dfact(_m) * _dfact(_n) / _dfact(momentum)) for _l, _m, _n in _components])
+    return _matrix * _scale
+
+def shell_blocks(basis: list[Shell]) -> list[list[int]]:
+    """
+    Groups the basis functions into shell blocks.
+
+    Consecutive functions that share their center, exponents and total angular momentum belong to the same
+    block. When a complete Cartesian shell is stored in the canonical order, the block can be transformed to
+    spherical functions.
+
+    Args:
+    -----
+        basis (list[Shell]): The basis functions.
+
+    Returns:
+    --------
+        list[list[int]]: The basis indices of the functions in every block.
+    """
+    _blocks = []
+    for _index, _shell in enumerate(basis):
+        if _blocks:
+            _last = basis[_blocks[-1][-1]]
+            if (_last.type == _shell.type and numpy.array_equal(_last.center, _shell.center) and numpy.array_equal(_last.exponents, _shell.exponents)
+                    and len(_blocks[-1]) < len(cartesian_components(_shell.type.value))):
+                _blocks[-1].append(_index)
+                continue
+        _blocks.append([_index])
+    return _blocks
+
+def block_matrices(basis: list[Shell], blocks: list[list[int]], spherical: bool) -> list[list[list[float]]]:
+    """
+    Returns the transformation matrix of every shell block.
+
+    Args:
+    -----
+        basis (list[Shell]): The basis functions.
+        blocks (list[list[int]]): The shell blocks, as returned by `shell_blocks`.
+        spherical (bool): Whether the blocks are transformed to spherical functions, otherwise
+            the matrices are the identity.
+
+    Returns:
+    --------
+        list[numpy.ndarray]: One matrix of shape (nfunctions, ncartesian) per block.
+
+    Raises:
+    -------
+        ValueError: If a spherical transformation is requested for an incomplete Cartesian shell.
+    """
+    _matrices = []
+    for _block in blocks:
+        _momentum = basis[_block[0]].type.value
+        if not spherical:
+            _matrices.append(numpy.eye(len(_block)))
+            continue
+        if [tuple(basis[_i].shell) for _i in _block] != cartesian_components(_momentum):
+            raise ValueError(f"The functions {_block} do not form a complete Cartesian shell in canonical order, so they cannot be made spherical.")
+        _matrices.append(cart2sph(_momentum))
+    return _matrices
+
+def transform(tensor: list[float], basis: list[Shell], spherical: bool = True, axes: typing.Optional[list[int]] = None) -> list[float]:
+    """
+    Transforms integrals over Cartesian functions to spherical functions.
+
+    The transformation is applied one axis at a time as a batched matrix multiply, with one batch per
+    angular momentum, so every block of the same shell type is transformed by a single call.
+
+    Args:
+    -----
+        tensor (numpy.ndarray): The integrals over the Cartesian basis functions.
+        basis (list[Shell]): The basis functions.
+        spherical (bool): Whether to transform at all. If False, the tensor is returned as is.
+        axes (Optional[list[int]]): The axes to transform, by default all of them.
+
+    Returns:
+    --------
+        numpy.ndarray: The integrals over the spherical basis functions.
+    """
+    if not spherical:
+        return tensor
+
+    _blocks   = shell_blocks(basis)
+    _matrices = block_matrices(basis, _blocks, spherical)
+    _offsets  = numpy.cumsum([0] + [_matrix.shape[0] for _matrix in _matrices])
+
+    # Group the blocks by shell type, each group is transformed as one batch
+    _groups = {}
+    for _index, _block in enumerate(_blocks):
+        _groups.setdefault(basis[_block[0]].type.value, []).append(_index)
+
+    _result = numpy.asarray(tensor)
+    for _axis in (range(_result.ndim) if axes is None else axes):
+        _moved  = numpy.moveaxis(_result, _axis, 0)
+        _output = numpy.zeros((_offsets[-1],) + _moved.shape[1:], dtype = _moved.dtype)
+        for _momentum, _members in _groups.items():
+            _matrix    = _matrices[_members[0]]
+            _cartesian = numpy.array([_blocks[_i] for _i in _members])
+            _pure      = numpy.array([numpy.arange(_offsets[_i], _offsets[_i + 1]) for _i in _members])
+            _output[_pure] = numpy.einsum("sc,bc...->bs...", _matrix, _moved[_cartesian])
+        _result = numpy.moveaxis(_output, 0, _axis)
+    return _result
@@ -0,0 +1,70 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy
+
+class DIIS:
+    """
+    Pulay's direct inversion in the iterative subspace (DIIS) for SCF convergence acceleration.
+
+    The Fock matrices of the previous iterations are combined linearly such that the norm of the
+    combined error vector FDS - SDF is minimal, subject to the coefficients summing to one.
+
+    Attributes:
+    -----------
+        size (int): The maximum number of stored Fock and error matrices.
+        focks (list[numpy.ndarray]): The stored Fock matrices.
+        errors (list[numpy.ndarray]): The stored error matrices.
+    """
+    def __init__(self, size: int = 8) -> None:
+        self.size   = size
+        self.focks  = []
+        self.errors = []
+
+    def extrapolate(self, fock: list[list[float]], error: list[list[float]]) -> list[list[float]]:
+        """
+        Stores a Fock matrix with its error matrix and returns the extrapolated Fock matrix.
+
+        Args:
+        -----
+            fock (numpy.ndarray): The Fock matrix of the current iteration.
+            error (numpy.ndarray): The corresponding error matrix.
+
+        Returns:
+        --------
+            numpy.ndarray: The DIIS extrapolated Fock matrix.
+        """
+        self.focks.append(fock)
+        self.errors.append(error)
+        if len(self.focks) > self.size:
+            self.focks.pop(0)
+            self.errors.pop(0)
+
+        # Solve the constrained least squares problem through its augmented linear system
+        _nvec   = len(self.focks)
+        _matrix = -numpy.ones((_nvec + 1, _nvec + 1))
+        _matrix[-1, -1] = 0.0
+        _matrix[:-1, :-1] = [[numpy.sum(_ei * _ej) for _ej in self.errors] for _ei in self.errors]
+        _rhs    = numpy.zeros(_nvec + 1)
+        _rhs[-1] = -1.0
+        _coeffs = numpy.linalg.lstsq(_matrix, _rhs, rcond = None)[0][:-1]
+        return sum(_c * _f for _c, _f in zip(_coeffs, self.focks))
+
+    def reset(self) -> None:
+        """
+        Discards the stored Fock and error matrices.
+        """
+        self.focks  = []
+        self.errors = []
@@ -0,0 +1,168 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy
+import typing
+
+class SecondOrder:
+    """
+    Augmented Hessian (trust region Newton) solver for orbital rotations.
+
+    The step x minimizing the quadratic model E(x) = g.x + x.Hx/2 follows from the lowest eigenvector
+    (1, x) of the augmented Hessian [[0, g^T], [g, H]], which is found with the Davidson method. The
+    Hessian is never stored: it is applied to trial vectors through `product`, which usually costs one
+    Fock-like build, so every macro-iteration costs a few builds but the convergence is quadratic.
+    Steps longer than the trust radius are scaled back, and the trust radius follows the ratio of the
+    actual to the predicted energy change. The solver works on flattened rotation vectors, so spin
+    channels or other orbital spaces are handled by concatenating their rotations.
+
+    Attributes:
+    -----------
+        trust_radius (float): The largest allowed step length.
+        max_micro (int): The maximum number of Davidson iterations per step.
+        tolerance (float): The residual of the augmented Hessian equations, relative to the gradient, at which a step is accepted.
+        predicted (float): The energy change predicted by the quadratic model for the last step.
+    """
+    def __init__(self, trust_radius: float = 0.5, max_micro: int = 12, tolerance: float = 1e-2) -> None:
+        self.trust_radius = trust_radius
+        self.max_micro    = max_micro
+        self.tolerance    = tolerance
+        self.predicted    = 0.0
+
+    def solve(self, gradient: list[float], product: typing.Callable[[list[float]], list[float]], diagonal: list[float]) -> list[float]:
+        """
+        Computes the orbital rotation step for a gradient.
+
+        Args:
+        -----
+            gradient (numpy.ndarray): The orbital gradient g.
+            product (Callable): Applies the orbital Hessian to a vector, x -> Hx.
+            diagonal (numpy.ndarray): An approximation to the diagonal of the Hessian, used as preconditioner.
+
+        Returns:
+        --------
+            numpy.ndarray: The step x, no longer than the trust radius.
+        """
+        _gnorm    = numpy.linalg.norm(gradient)
+        self.predicted = 0.0
+        if _gnorm < 1e-12:
+            return numpy.zeros_like(gradient)
+
+        _diagonal = numpy.maximum(diagonal, 1e-2)
+        _vectors  = []
+        _products = []
+        _trial    = -gradient / _diagonal
+        _step, _hstep = numpy.zeros_like(gradient), numpy.zeros_like(gradient)
+        for _ in range(self.max_micro):
+            # Orthonormalize the new direction against the subspace, twice for stability
+            for _vector in _vectors + _vectors:
+                _trial = _trial - numpy.dot(_vector, _trial) * _vector
+            _norm = numpy.linalg.norm(_trial)
+            if _norm < 1e-10:
+                break
+            _vectors.append(_trial / _norm)
+            _products.append(product(_vectors[-1]))
+
+            # Lowest eigenpair of the augmented Hessian projected onto the subspace
+            _basis     = numpy.array(_vectors)
+            _hessian   = _basis @ numpy.array(_products).T
+            _augmented = numpy.zeros((len(_vectors) + 1, len(_vectors) + 1))
+            _augmented[1:, 1:] = 0.5 * (_hessian + _hessian.T)
+            _augmented[0, 1:]  = _augmented[1:, 0] = _basis @ gradient
+            _values, _eigenvectors = numpy.linalg.eigh(_augmented)
+            _lowest    = _values[0]
+            _scale     = _eigenvectors[0, 0] if abs(_eigenvectors[0, 0]) > 1e-8 else 1e-8
+            _step      = _basis.T @ (_eigenvectors[1:, 0] / _scale)
+            _hstep     = numpy.array(_products).T @ (_eigenvectors[1:, 0] / _scale)
+
+            _residual = gradient + _hstep - _lowest * _step
+            if numpy.linalg.norm(_residual) < self.tolerance * _gnorm:
+                break
+            _trial = -_residual / numpy.maximum(_diagonal - _lowest, 1e-2)
+
+        # Restrict the step to the trust region
+        _length = numpy.linalg.norm(_step)
+        if _length > self.trust_radius:
+            _step, _hstep = _step * (self.trust_radius / _length), _hstep * (self.trust_radius / _length)
+        self.predicted = float(numpy.dot(gradient, _step) + 0.5 * numpy.dot(_step, _hstep))
+        return _step
+
+    def update(self, actual: float) -> bool:
+        """
+        Adapts the trust radius to the quality of the last step.
+
+        Args:
+        -----
+            actual (float): The energy change of the last step.
+
+        Returns:
+        --------
+            bool: Whether the step is accepted, i.e. did not raise the energy beyond numerical noise.
+        """
+        # Energy changes below the numerical noise of the Fock builds are neither rewarded nor penalized
+        if abs(actual) < 1e-10 and abs(self.predicted) < 1e-10:
+            return True
+        _ratio = actual / self.predicted if self.predicted < 0.0 else 0.0
+        if actual > 0.0 or _ratio < 0.25:
+            self.trust_radius = max(0.5 * self.trust_radius, 1e-3)
+        elif _ratio > 0.75:
+            self.trust_radius = min(2.0 * self.trust_radius, 1.0)
+        return actual <= 1e-10
+
+def rotate(coefficients: list[list[float]], rotation: list[list[float]], nocc: int) -> list[list[float]]:
+    """
+    Rotates orthonormal orbitals, C' = C exp(X), with X_ai = kappa_ai for virtual a and occupied i, and X_ia = -kappa_ai.
+
+    Args:
+    -----
+        coefficients (numpy.ndarray): The orbital coefficients, one orbital per column.
+        rotation (numpy.ndarray): The virtual-occupied rotation parameters kappa with shape (nvirt, nocc).
+        nocc (int): The number of occupied orbitals.
+
+    Returns:
+    --------
+        numpy.ndarray: The rotated orbital coefficients.
+    """
+    import scipy.linalg
+
+    _generator = numpy.zeros((coefficients.shape[1], coefficients.shape[1]))
+    _generator[nocc:, :nocc] = rotation
+    _generator[:nocc, nocc:] = -rotation.T
+    return coefficients @ scipy.linalg.expm(_generator)
+
+def diis_stalled(errors: list[float], energies: list[float], window: int = 6) -> bool:
+    """
+    Tells whether DIIS stopped making progress.
+
+    DIIS is considered stalled when the smallest error of the last `window` iterations is not at least half the
+    smallest error before, and oscillating when the energy changes alternate in sign over the window while the
+    error does not decrease by a factor of two.
+
+    Args:
+    -----
+        errors (list[float]): The DIIS error norms of all iterations.
+        energies (list[float]): The energies of all iterations.
+        window (int): The number of recent iterations that are inspected.
+
+    Returns:
+    --------
+        bool: Whether switching to a second-order solver is advisable.
+    """
+    if len(errors) < 2 * window:
+        return False
+    _stalled = min(errors[-window:]) > 0.5 * min(errors[:-window])
+    _changes = numpy.diff(energies[-window - 1:])
+    _flips   = numpy.sum(numpy.sign(_changes[1:]) != numpy.sign(_changes[:-1]))
+    return bool(_stalled or (_flips >= window - 2 and errors[-1] > 0.5 * errors[-window]))
@@ -13,10 +13,17 @@
 #  You should have received a copy of the GNU General Public License along with
 #  this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from planck.src.basis.base import load_basis
 from planck.src.calculators.base import BaseCalculator
+from planck.src.calculators.hf.diis import DIIS
+from planck.src.calculators.hf.newton import SecondOrder, diis_stalled, rotate
 from planck.src.exceptions.base import ChargeMultiplicityError
 from planck.src.geometry.cartesian import Molecule as Cartesian
 from planck.src.geometry.zmatrix import Molecule as ZMatrix
+from planck.src.helpers import tables
+from planck.src.integrals.oneelectron import Kinetic, NuclearAttraction, Overlap
+from planck.src.integrals.storage import IntegralStorage, StoragePlan
+from planck.src.integrals.twoelectron import ERI, load_engine
 import numpy
 import typing
  
@@ -33,6 +40,17 @@ class RHF(BaseCalculator):
     and occupy the same spatial orbitals. This class supports molecular representations
     in both Cartesian and Z-Matrix coordinate systems.
 
+    The SCF equations are solved with DIIS acceleration, switching to a second-order (augmented
+    Hessian) solver when DIIS stalls or oscillates, and the two-electron part of the
+    Fock matrix is built from the integrals in every iteration. Within the memory and disk budgets,
+    the most expensive integral quartets are stored after their first evaluation, the others are
+    recomputed (see `StoragePlan`). Optionally, integral
+    quartets with a small Schwarz bound are evaluated in single precision until the SCF is
+    close to convergence, after which the Fock matrix is rebuilt in full double precision.
+    For large molecules, the Coulomb matrix can be built with a multipole expansion for well
+    separated charge distributions, with only the near-field quartets computed exactly.
+    Alternatively, J and K are built from a pivoted Cholesky decomposition of the integrals.
+
     Parameters
     ----------
     molecule : typing.Union[Cartesian, ZMatrix]
@@ -44,27 +62,113 @@ class RHF(BaseCalculator):
     calculator():
         Implements the RHF computational workflow. This method must be called to
         perform the RHF calculation on the provided molecular geometry.
+    fock():
+        Builds the Fock matrix for a given density matrix.
+    twoelectron():
+        Builds the two-electron part J - K/2 of the Fock matrix, also for density changes.
     
     Attributes
     ----------
     molecule : typing.Union[Cartesian, ZMatrix]
         The molecular geometry object passed during initialization.
+    basis : list[Shell]
+        The basis functions of the molecule.
+    energy : float
+        The converged total energy in Hartree.
+    orbital_energies : numpy.ndarray
+        The orbital energies in Hartree.
+    coefficients : numpy.ndarray
+        The molecular orbital coefficients, one orbital per column.
+    density : numpy.ndarray
+        The converged density matrix, D = 2 C_occ C_occ^T.
+    converged : bool
+        Whether the SCF converged within the allowed number of iterations.
+    storage_plan : typing.Optional[StoragePlan]
+        The integral storage strategy, whose `report` summarizes the plan and its cost estimate,
+        or None when J and K are built from Cholesky vectors.
     """
     
-    def calculator(self, molecule: typing.Union[Cartesian, ZMatrix], basis_sets: typing.Dict[str, str]):
+    def calculator(self, molecule: typing.Union[Cartesian, ZMatrix], basis_sets: typing.Dict[str, str], spherical: bool = False, max_iterations: int = 100,
+                   energy_convergence: float = 1e-8, error_convergence: float = 1e-6, diis_size: int = 8, mixed_precision: float = 0.0, precision_switch: float = 1e-4,
+                   multipole: bool = False, multipole_order: int = 6, multipole_separation: float = 1.0, solver: str = "auto", stall_window: int = 6,
+                   memory: float = 256.0, disk: float = 0.0, scratch: typing.Optional[str] = None, cholesky: float = 0.0):
         """
-        Initializes the RHF calculator with the molecular geometry.
+        Initializes the RHF calculator with the molecular geometry and runs the SCF.
 
         Parameters
         ----------
         molecule : typing.Union[Cartesian, ZMatrix]
             A molecular geometry object, either in Cartesian or Z-Matrix format.
+        basis_sets : typing.Dict[str, str]
+            The basis set used for every element, e.g. {"H": "sto-3g"}.
+        spherical : bool
+            Whether to use spherical (pure) instead of Cartesian basis functions.
+        max_iterations : int
+            The maximum number of SCF iterations.
+        energy_convergence : float
+            The convergence threshold on the change of the total energy.
+        error_convergence : float
+            The convergence threshold on the largest element of the DIIS error FDS - SDF.
+        diis_size : int
+            The number of Fock matrices kept for the DIIS extrapolation.
+        mixed_precision : float
+            The Schwarz bound below which integral quartets are evaluated in single precision. These quartets
+            are never stored (see `StoragePlan`). A value of zero disables mixed precision, and so does a
+            threshold below the bound of every quartet.
+        precision_switch : float
+            The DIIS error below which the Fock matrix is built in full double precision.
+        multipole : bool
+            Whether the Coulomb matrix is built with the multipole accelerated near-field / far-field split.
+            The exchange matrix is always built exactly.
+        multipole_order : int
+            The highest rank of the multipole moments used for the far field.
+        multipole_separation : float
+            The ratio of center distance to summed extents beyond which two charge distributions are treated as far
+            apart. Smaller values move more interactions to the far field, at the cost of accuracy.
+        solver : str
+            The SCF solver, "diis", "newton" for augmented Hessian steps from the start, or "auto" to switch
+            from DIIS to augmented Hessian steps when DIIS stalls or oscillates.
+        stall_window : int
+            The number of iterations inspected to decide whether DIIS stalls or oscillates.
+        memory : float
+            The memory budget for storing integrals between Fock builds, in MB.
+        disk : float
+            The disk budget for storing integrals between Fock builds, in MB.
+        scratch : typing.Optional[str]
+            The directory of the integral file, by default the system temporary directory.
+        cholesky : float
+            The threshold of the pivoted Cholesky decomposition of the integrals. If positive, J and K are built
+            from the Cholesky vectors, which replaces the direct, mixed precision and multipole builds.
         """
         self.molecule = molecule
         _sanity_check = self.check_multiplicity()
         
+        self.basis     = load_basis(self.molecule.atoms, self.molecule.coords, basis_sets)
+        self.spherical = spherical
+        self.overlap   = Overlap(self.basis, spherical).evaluate()
+        self.hcore     = Kinetic(self.basis, spherical).evaluate() + NuclearAttraction(self.basis, self.molecule.atomicnumbers, numpy.asarray(self.molecule.coords) * tables.ANGSTROM_TO_BOHR, spherical).evaluate()
+        self.eri       = ERI(self.basis, spherical)
+        self.multipole = load_engine("multipole")(self.eri, multipole_order, multipole_separation) if multipole else None
+        self.cholesky  = load_engine("cholesky")(self.eri, cholesky) if cholesky > 0.0 else None
+        self.storage_plan = None
+        if self.cholesky is None:
+            self.storage_plan = StoragePlan(self.eri, memory, disk, mixed_threshold = mixed_precision if solver != "newton" else 0.0)
+            self.eri.storage  = IntegralStorage(self.storage_plan, scratch)
+        self.nuclear_repulsion = self.molecule.nuclear_repulsion()
+        self.nocc      = int(numpy.sum(self.molecule.atomicnumbers) - self.molecule.charge) // 2
+        
+        self.max_iterations     = max_iterations
+        self.energy_convergence = energy_convergence
+        self.error_convergence  = error_convergence
+        self.diis_size          = diis_size
+        self.mixed_precision    = mixed_precision
+        self.precision_switch   = precision_switch
+        self.solver             = solver
+        self.stall_window       = stall_window
+        self.scf()
+        
     def check_multiplicity(self) -> typing.Union[bool]:
-        _total_electrons = numpy.sum(self.molecule.atomicnumbers) + self.molecule.charge
+        _total_electrons = numpy.sum(self.molecule.atomicnumbers) - self.molecule.charge
 
         # Check if the total number of electrons in even and multiplicity is one => No unpaired electrons
         if (self.molecule.multi < 1):
@@ -74,5 +178,177 @@ class RHF(BaseCalculator):
         else:
             raise ChargeMultiplicityError(message = f"The combination of {self.molecule.charge} and {self.molecule.multi} is not allowed. Please check the input carefully!")
         return False
+
+    def fock(self, density: list[list[float]], mixed_threshold: float = 0.0) -> list[list[float]]:
+        """
+        Builds the Fock matrix F = H + J - K/2 for a density matrix.
+
+        Parameters
+        ----------
+        density : numpy.ndarray
+            The density matrix D = 2 C_occ C_occ^T.
+        mixed_threshold : float
+            The Schwarz bound below which integral quartets are evaluated in single precision.
+
+        Returns
+        -------
+        numpy.ndarray
+            The Fock matrix, always accumulated in double precision.
+        """
+        return self.hcore + self.twoelectron(density, mixed_threshold)
+
+    def twoelectron(self, density: list[list[float]], mixed_threshold: float = 0.0) -> list[list[float]]:
+        """
+        Builds the two-electron part G = J - K/2 of the Fock matrix for a density matrix.
+
+        Parameters
+        ----------
+        density : numpy.ndarray
+            A symmetric density matrix, which may also be a density change.
+        mixed_threshold : float
+            The Schwarz bound below which integral quartets are evaluated in single precision.
+
+        Returns
+        -------
+        numpy.ndarray
+            The matrix J - K/2.
+        """
+        if self.cholesky is not None:
+            _coulomb, _exchange = self.cholesky.jk(density)
+        elif self.multipole is None:
+            _coulomb, _exchange = self.eri.jk(density, mixed_threshold)
+        else:
+            _coulomb, _exchange = self.eri.jk(density, mixed_threshold, nearfield = self.multipole.nearfield)
+            _coulomb += self.multipole.farfield(density)
+        return _coulomb - 0.5 * _exchange
+
+    def scf(self) -> None:
+        """
+        Solves the RHF equations self-consistently with DIIS acceleration or a second-order solver.
+
+        The initial guess diagonalizes the core Hamiltonian. While mixed precision is active, convergence is
+        never declared; single precision is switched off as soon as the DIIS error drops below the switching
+        threshold, or when the estimated single precision error of the Fock matrix exceeds a tenth of the DIIS
+        error, so that the final iterations always use a Fock matrix built in full double precision. Mixed precision
+        is only used when the storage plan leaves quartets below the threshold, and never with Cholesky vectors.
+
+        With the automatic solver, the SCF switches to augmented Hessian steps as soon as DIIS stalls or
+        oscillates. Second-order steps that raise the energy are rejected and retried from the previous orbitals
+        with a smaller trust radius. The converged orbitals are canonicalized within the occupied and the
+        virtual space, which leaves the density unchanged.
+        """
+        # Canonical orthogonalization, dropping near linear dependencies
+        _values, _vectors = numpy.linalg.eigh(self.overlap)
+        _keep = _values > 1e-8
+        self.orthogonalizer = _vectors[:, _keep] / numpy.sqrt(_values[_keep])
+        
+        self.orbital_energies, self.coefficients = self._diagonalize(self.hcore)
+        self.density   = self._density(self.coefficients)
+        self.energy    = 0.0
+        self.converged = False
+        self.precision_history = []
+        self.solver_history    = []
         
-            
\ No newline at end of file
+        _diis     = DIIS(self.diis_size)
+        _newton   = SecondOrder()
+        _solver   = "newton" if self.solver == "newton" else "diis"
+        _mixed    = self.mixed_precision if _solver == "diis" and self.storage_plan is not None and self.storage_plan.single > 0 else 0.0
+        _errors   = []
+        _energies = []
+        _accepted = None
+        for self.iterations in range(1, self.max_iterations + 1):
+            _fock, _energy, _error, _norm = self._evaluate(self.density, _mixed)
+            self.precision_history.append((_mixed > 0.0, self.eri.precision_error))
+            
+            # Promote to full double precision for the final iterations, and rebuild the current Fock matrix. The DIIS
+            # history is kept, since the single precision error of the earlier Fock matrices is well below their DIIS error
+            if _mixed > 0.0 and (_norm < self.precision_switch or self.eri.precision_error > 0.1 * _norm):
+                _mixed = 0.0
+                _fock, _energy, _error, _norm = self._evaluate(self.density)
+            
+            # A second-order step that raised the energy is undone, the next step is taken with a smaller trust radius
+            if _accepted is not None and not _newton.update(_energy - _accepted[3]):
+                self.coefficients, self.density, _fock, _energy, _error, _norm = _accepted
+            
+            _delta, self.energy, self.fockmatrix = _energy - self.energy, _energy, _fock
+            self.solver_history.append(_solver)
+            if _mixed == 0.0 and abs(_delta) < self.energy_convergence and _norm < self.error_convergence:
+                self.converged = True
+                break
+            
+            _errors.append(_norm)
+            _energies.append(_energy)
+            if _solver == "diis" and self.solver == "auto" and diis_stalled(_errors, _energies, self.stall_window):
+                _solver = "newton"
+                if _mixed > 0.0:
+                    _mixed = 0.0
+                    _fock, _energy, _error, _norm = self._evaluate(self.density)
+                    self.energy, self.fockmatrix = _energy, _fock
+            
+            if _solver == "newton":
+                _accepted = (self.coefficients, self.density, _fock, _energy, _error, _norm)
+                self.coefficients = self._newton_step(_fock, _newton)
+            else:
+                self.orbital_energies, self.coefficients = self._diagonalize(_diis.extrapolate(_fock, _error))
+            self.density = self._density(self.coefficients)
+        
+        if _solver == "newton":
+            self._canonicalize()
+            
+    def _evaluate(self, density: list[list[float]], mixed_threshold: float = 0.0) -> tuple[list[list[float]], float, list[list[float]], float]:
+        """
+        Builds the Fock matrix of a density and returns it with the total energy, the orthogonalized error
+        FDS - SDF and the largest absolute element of the error.
+        """
+        _fock   = self.fock(density, mixed_threshold)
+        _energy = 0.5 * numpy.sum(density * (self.hcore + _fock)) + self.nuclear_repulsion
+        _error  = self.orthogonalizer.T @ (_fock @ density @ self.overlap - self.overlap @ density @ _fock) @ self.orthogonalizer
+        return _fock, _energy, _error, numpy.max(numpy.abs(_error))
+
+    def _newton_step(self, fock: list[list[float]], solver: SecondOrder) -> list[list[float]]:
+        """
+        Rotates the orbitals by an augmented Hessian step.
+
+        With kappa_ai rotating occupied orbital i towards virtual orbital a, the RHF orbital gradient is
+        g_ai = 4 F_ai and the exact Hessian acts on a trial rotation as
+            (H kappa)_ai = 4 (F_ab kappa_bi - kappa_aj F_ji) + 4 [C_v^T G(dD) C_o]_ai,
+        where G(dD) = J(dD) - K(dD)/2 is a Fock-like build of the density change dD = 2 (C_v kappa C_o^T + C_o kappa^T C_v^T).
+        """
+        _occupied, _virtual = self.coefficients[:, :self.nocc], self.coefficients[:, self.nocc:]
+        _mo       = self.coefficients.T @ fock @ self.coefficients
+        _foo, _fvv = _mo[:self.nocc, :self.nocc], _mo[self.nocc:, self.nocc:]
+        _gradient = 4.0 * _mo[self.nocc:, :self.nocc]
+        _diagonal = 4.0 * (numpy.diag(_fvv)[:, None] - numpy.diag(_foo)[None, :])
+
+        def _product(vector: list[float]) -> list[float]:
+            _kappa = vector.reshape(_gradient.shape)
+            _delta = 2.0 * _virtual @ _kappa @ _occupied.T
+            _response = _virtual.T @ self.twoelectron(_delta + _delta.T) @ _occupied
+            return (4.0 * (_fvv @ _kappa - _kappa @ _foo) + 4.0 * _response).ravel()
+
+        _step = solver.solve(_gradient.ravel(), _product, _diagonal.ravel())
+        return rotate(self.coefficients, _step.reshape(_gradient.shape), self.nocc)
+
+    def _canonicalize(self) -> None:
+        """
+        Diagonalizes the Fock matrix separately within the occupied and the virtual orbitals.
+        """
+        _mo = self.coefficients.T @ self.fockmatrix @ self.coefficients
+        _eocc, _uocc = numpy.linalg.eigh(_mo[:self.nocc, :self.nocc])
+        _evir, _uvir = numpy.linalg.eigh(_mo[self.nocc:, self.nocc:])
+        self.orbital_energies = numpy.concatenate([_eocc, _evir])
+        self.coefficients     = numpy.hstack([self.coefficients[:, :self.nocc] @ _uocc, self.coefficients[:, self.nocc:] @ _uvir])
+
+    def _diagonalize(self, fock: list[list[float]]) -> tuple[list[float], list[list[float]]]:
+        """
+        Solves the Roothaan equations FC = SCe in the orthogonalized basis.
+        """
+        _energies, _vectors = numpy.linalg.eigh(self.orthogonalizer.T @ fock @ self.orthogonalizer)
+        return _energies, self.orthogonalizer @ _vectors
+    
+    def _density(self, coefficients: list[list[float]]) -> list[list[float]]:
+        """
+        Builds the closed-shell density matrix D = 2 C_occ C_occ^T.
+        """
+        _occupied = coefficients[:, :self.nocc]
+        return 2.0 * _occupied @ _occupied.T
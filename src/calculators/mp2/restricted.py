@@ -0,0 +1,100 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+# 
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+# 
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.calculators.base import BaseCalculator
+from planck.src.calculators.hf.restricted import RHF
+from planck.src.geometry.cartesian import Molecule as Cartesian
+from planck.src.geometry.zmatrix import Molecule as ZMatrix
+import numpy
+import typing
+
+class RMP2(BaseCalculator):
+    """
+    Restricted second-order Moller-Plesset perturbation theory (RMP2) Calculator Class.
+
+    The correlation energy of a closed-shell RHF reference is
+        E(2) = sum_ijab (ia|jb) [2 (ia|jb) - (ib|ja)] / (e_i + e_j - e_a - e_b),
+    with i, j running over the active occupied and a, b over the virtual orbitals. The integrals (ia|jb) are
+    assembled from Cholesky vectors transformed to the molecular orbitals, B^P_ia, one occupied orbital at a
+    time, so that the full four-index tensor is never stored. The same decomposition builds J and K in the Fock
+    matrices of the RHF reference, so the integrals are decomposed only once. A threshold of zero uses the exact
+    integrals for both instead, which is only feasible for small molecules.
+
+    Parameters
+    ----------
+    molecule : typing.Union[Cartesian, ZMatrix]
+        A molecular geometry object, either in Cartesian coordinates or 
+        Z-Matrix format, describing the structure of the molecule.
+
+    Methods
+    -------
+    calculator():
+        Runs the RHF reference and computes the MP2 correlation energy.
+
+    Attributes
+    ----------
+    reference : RHF
+        The converged RHF reference calculation.
+    cholesky : typing.Optional[CholeskyERI]
+        The Cholesky decomposition of the integrals, shared with the reference, or None for exact integrals.
+    correlation_energy : float
+        The MP2 correlation energy in Hartree.
+    energy : float
+        The total MP2 energy in Hartree.
+    """
+
+    def calculator(self, molecule: typing.Union[Cartesian, ZMatrix], basis_sets: typing.Dict[str, str], cholesky: float = 1e-6, frozen_core: int = 0, **options):
+        """
+        Runs the RHF reference calculation and computes the MP2 energy.
+
+        Parameters
+        ----------
+        molecule : typing.Union[Cartesian, ZMatrix]
+            A molecular geometry object, either in Cartesian or Z-Matrix format.
+        basis_sets : typing.Dict[str, str]
+            The basis set used for every element, e.g. {"H": "sto-3g"}.
+        cholesky : float
+            The threshold of the Cholesky decomposition of the integrals, used for the RHF reference and for MP2.
+            A value of zero uses the exact integrals.
+        frozen_core : int
+            The number of lowest occupied orbitals excluded from the correlation treatment.
+        options : dict
+            Further options passed to `RHF.calculator`.
+        """
+        self.molecule  = molecule
+        self.reference = RHF()
+        self.reference.calculator(molecule, basis_sets, cholesky = cholesky, **options)
+
+        _nocc      = self.reference.nocc
+        _energies  = self.reference.orbital_energies
+        _occupied  = self.reference.coefficients[:, frozen_core:_nocc]
+        _virtual   = self.reference.coefficients[:, _nocc:]
+        _eocc, _evir = _energies[frozen_core:_nocc], _energies[_nocc:]
+
+        self.cholesky = self.reference.cholesky
+        if self.cholesky is not None:
+            _vectors  = self.cholesky.transform(_occupied, _virtual)
+            _integral = lambda i: numpy.einsum("pa,pjb->ajb", _vectors[:, i, :], _vectors)
+        else:
+            _ovov     = numpy.einsum("pi,qa,rj,sb,pqrs->iajb", _occupied, _virtual, _occupied, _virtual, self.reference.eri.evaluate(), optimize = True)
+            _integral = lambda i: _ovov[i]
+
+        # Accumulate the pair energies of one occupied orbital i at a time, (ia|jb) with shape (nvir, nocc, nvir)
+        self.correlation_energy = 0.0
+        for _i in range(_occupied.shape[1]):
+            _iajb = _integral(_i)
+            _denominator = _eocc[_i] + _eocc[None, :, None] - _evir[:, None, None] - _evir[None, None, :]
+            self.correlation_energy += float(numpy.sum(_iajb * (2.0 * _iajb - _iajb.transpose(2, 1, 0)) / _denominator))
+        self.energy = self.reference.energy + self.correlation_energy
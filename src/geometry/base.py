@@ -14,6 +14,8 @@
 #  this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from abc import ABC, abstractmethod
+from planck.src.geometry import spatial
+from planck.src.helpers import tables
 import numpy
 
 class BaseMolecule(ABC):
@@ -29,6 +31,10 @@ class BaseMolecule(ABC):
         geometry():
             Abstract method that must be implemented by subclasses to define 
             the geometric properties of the molecule.
+        distance_matrix():
+            Returns the interatomic distances in angstrom.
+        nuclear_repulsion():
+            Returns the nuclear repulsion energy in Hartree.
     """
 
     @abstractmethod
@@ -43,4 +49,22 @@ class BaseMolecule(ABC):
         Raises:
             NotImplementedError: If the method is not implemented in a subclass.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def distance_matrix(self) -> list[list[float]]:
+        """
+        Computes the matrix of interatomic distances.
+
+        Returns:
+            numpy.ndarray: The distances in angstrom, with shape (natoms, natoms).
+        """
+        return spatial.distance_matrix(self.coords)
+
+    def nuclear_repulsion(self) -> float:
+        """
+        Computes the nuclear repulsion energy of the molecule.
+
+        Returns:
+            float: The nuclear repulsion energy in Hartree.
+        """
+        return spatial.nuclear_repulsion(numpy.asarray(self.coords) * tables.ANGSTROM_TO_BOHR, self.atomicnumbers)
@@ -0,0 +1,152 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import itertools
+import numpy
+import typing
+
+# Neighboring cell offsets, each unordered pair of cells is visited once through the positive half
+_HALF_OFFSETS = [_offset for _offset in itertools.product((-1, 0, 1), repeat = 3) if _offset > (0, 0, 0)]
+
+def distance_matrix(coords: list[float], other: typing.Optional[list[float]] = None) -> list[list[float]]:
+    """
+    Computes the matrix of distances between two sets of points.
+
+    Args:
+    -----
+        coords (list[float]): The points, either flattened as stored in `Molecule.coords` or with shape (n, 3).
+        other (Optional[list[float]]): A second set of points. If omitted, the distances within `coords` are computed.
+
+    Returns:
+    --------
+        numpy.ndarray: The distances with shape (n, m), in the units of the coordinates.
+    """
+    _first  = numpy.asarray(coords, dtype = float).reshape(-1, 3)
+    _second = _first if other is None else numpy.asarray(other, dtype = float).reshape(-1, 3)
+    return numpy.sqrt(numpy.sum((_first[:, None, :] - _second[None, :, :])**2, axis = -1))
+
+def nuclear_repulsion(coords: list[float], charges: list[float], chunk: int = 1024) -> float:
+    """
+    Computes the Coulomb repulsion between point charges, sum_(i<j) Z_i Z_j / r_ij.
+
+    The distances are processed in row blocks of `chunk` atoms, so memory stays bounded for large systems
+    while every block is fully vectorized.
+
+    Args:
+    -----
+        coords (list[float]): The positions of the charges, in bohr, flattened or with shape (n, 3).
+        charges (list[float]): The charges Z_i.
+        chunk (int): The number of rows of the distance matrix computed at once.
+
+    Returns:
+    --------
+        float: The repulsion energy in Hartree.
+    """
+    _coords  = numpy.asarray(coords, dtype = float).reshape(-1, 3)
+    _charges = numpy.asarray(charges, dtype = float)
+    _energy  = 0.0
+    for _start in range(0, _coords.shape[0], chunk):
+        _stop      = min(_start + chunk, _coords.shape[0])
+        _distances = distance_matrix(_coords[_start:_stop], _coords[_start:])
+
+        # Keep only j > i, the diagonal and the lower triangle of the block are masked out
+        _mask   = numpy.arange(_start, _coords.shape[0])[None, :] > numpy.arange(_start, _stop)[:, None]
+        _energy += numpy.sum(numpy.outer(_charges[_start:_stop], _charges[_start:])[_mask] / _distances[_mask])
+    return float(_energy)
+
+class CellList:
+    """
+    A uniform grid of cubic cells over a set of points for fast neighbor searches.
+
+    Every point is assigned to the cell containing it. Since the cells are at least as large as the
+    search radius, all neighbors of a point lie in its own or in one of the 26 adjacent cells, so
+    enumerating all close pairs costs O(n) for points of bounded density instead of O(n^2).
+
+    Attributes:
+    -----------
+        points (numpy.ndarray): The points with shape (n, 3).
+        cellsize (float): The edge length of the cells, which is also the largest supported search radius.
+        cells (numpy.ndarray): The integer cell coordinates of every point, with shape (n, 3).
+        members (dict[tuple[int, int, int], numpy.ndarray]): The indices of the points in every occupied cell.
+    """
+    def __init__(self, points: list[float], cellsize: float) -> None:
+        self.points   = numpy.asarray(points, dtype = float).reshape(-1, 3)
+        self.cellsize = max(float(cellsize), 1e-8)
+        self.cells    = numpy.floor(self.points / self.cellsize).astype(int)
+        self.members  = {}
+        for _index, _cell in enumerate(map(tuple, self.cells)):
+            self.members.setdefault(_cell, []).append(_index)
+        self.members  = {_cell: numpy.array(_indices) for _cell, _indices in self.members.items()}
+
+    def neighbors(self, point: list[float], radius: float) -> list[int]:
+        """
+        Returns the indices of all points within `radius` of a point.
+
+        Args:
+        -----
+            point (list[float]): The Cartesian coordinates [x, y, z] of the query point.
+            radius (float): The search radius, which may not exceed the cell size.
+
+        Returns:
+        --------
+            numpy.ndarray: The indices of the neighboring points.
+        """
+        if radius > self.cellsize:
+            raise ValueError(f"The search radius {radius} exceeds the cell size {self.cellsize}.")
+
+        _point = numpy.asarray(point, dtype = float)
+        _cell  = numpy.floor(_point / self.cellsize).astype(int)
+        _found = [self.members[_key] for _key in (tuple(_cell + _offset) for _offset in itertools.product((-1, 0, 1), repeat = 3)) if _key in self.members]
+        if not _found:
+            return numpy.array([], dtype = int)
+        _candidates = numpy.concatenate(_found)
+        return _candidates[numpy.sum((self.points[_candidates] - _point)**2, axis = 1) <= radius**2]
+
+    def pairs(self, radius: typing.Optional[float] = None) -> tuple[list[int], list[int]]:
+        """
+        Enumerates all pairs of points closer than `radius`, including every point paired with itself.
+
+        Args:
+        -----
+            radius (Optional[float]): The search radius, by default the cell size.
+
+        Returns:
+        --------
+            tuple: The indices (i, j) of every pair, with i >= j.
+        """
+        _radius = self.cellsize if radius is None else radius
+        if _radius > self.cellsize:
+            raise ValueError(f"The search radius {_radius} exceeds the cell size {self.cellsize}.")
+
+        _first, _second = [], []
+        for _cell, _indices in self.members.items():
+            # Pairs within the same cell, including the self pairs
+            _i, _j = numpy.tril_indices(_indices.size)
+            _close = numpy.sum((self.points[_indices[_i]] - self.points[_indices[_j]])**2, axis = 1) <= _radius**2
+            _first.append(_indices[_i][_close])
+            _second.append(_indices[_j][_close])
+
+            # Pairs with the neighboring cells, each unordered pair of cells is visited once
+            for _offset in _HALF_OFFSETS:
+                _other = self.members.get((_cell[0] + _offset[0], _cell[1] + _offset[1], _cell[2] + _offset[2]))
+                if _other is None:
+                    continue
+                _distances = numpy.sum((self.points[_indices][:, None, :] - self.points[_other][None, :, :])**2, axis = -1)
+                _i, _j     = numpy.nonzero(_distances <= _radius**2)
+                _first.append(_indices[_i])
+                _second.append(_other[_j])
+
+        _first, _second = numpy.concatenate(_first), numpy.concatenate(_second)
+        return numpy.maximum(_first, _second), numpy.minimum(_first, _second)
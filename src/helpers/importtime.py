@@ -0,0 +1,108 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+# 
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+# 
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Largest allowed import time of an entry point in seconds, measured in a fresh interpreter
+IMPORT_BUDGET = 0.25
+
+# The modules short-lived command line runs and batch workers start from
+ENTRY_POINTS = ["planck.src.calculators.hf.restricted", "planck.src.calculators.mp2.restricted", "planck.src.server.daemon"]
+
+# Heavy dependencies and optional engines that must only be loaded on first use
+LAZY_MODULES = ["scipy", "xml", "planck.src.integrals.multipole", "planck.src.integrals.cholesky"]
+
+def measure(module: str, repeats: int = 3) -> tuple[float, list[str]]:
+    """
+    Measures the cold import time of a module.
+
+    The module is imported in a fresh interpreter with `-X importtime`, and the cumulative time of the module is
+    read from the report. The fastest of `repeats` runs is returned, which removes the cost of writing bytecode
+    caches on the first run and most of the noise from other processes.
+
+    Args:
+    -----
+        module (str): The dotted name of the module.
+        repeats (int): The number of interpreters started.
+
+    Returns:
+    --------
+        tuple: The import time in seconds, and the modules of `LAZY_MODULES` that were loaded by the import.
+    """
+    _script = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    _time   = float("inf")
+    for _ in range(repeats):
+        _run = subprocess.run([sys.executable, "-X", "importtime", "-c", _script], capture_output = True, text = True, check = True)
+        for _line in _run.stderr.splitlines():
+            _fields = _line.split("|")
+            if len(_fields) == 3 and _fields[2].strip() == module:
+                _time = min(_time, 1e-6 * int(_fields[1]))
+    _loaded = [_name for _name in json.loads(_run.stdout) if any(_name == _lazy or _name.startswith(_lazy + ".") for _lazy in LAZY_MODULES)]
+    return _time, _loaded
+
+def check(modules: list[str] = ENTRY_POINTS, budget: float = IMPORT_BUDGET, repeats: int = 3) -> list[str]:
+    """
+    Checks the import time budget of the package.
+
+    Args:
+    -----
+        modules (list[str]): The modules that are imported.
+        budget (float): The largest allowed import time in seconds.
+        repeats (int): The number of measurements per module.
+
+    Returns:
+    --------
+        list[str]: A description of every violation, i.e. a module over budget or a lazy module loaded at import time.
+    """
+    _violations = []
+    for _module in modules:
+        _violations += _violations_of(_module, *measure(_module, repeats), budget)
+    return _violations
+
+def _violations_of(module: str, time: float, loaded: list[str], budget: float) -> list[str]:
+    """
+    Describes how a measured import violates the budget.
+    """
+    _violations = []
+    if time > budget:
+        _violations.append(f"{module} takes {time:.3f} s to import, the budget is {budget:.3f} s")
+    if loaded:
+        _violations.append(f"{module} loads {', '.join(loaded)} at import time")
+    return _violations
+
+def main() -> None:
+    """
+    Reports the import times of the entry points and exits with an error if the budget is exceeded.
+    """
+    _parser = argparse.ArgumentParser(description = "Checks the import time budget of planck.")
+    _parser.add_argument("modules", nargs = "*", default = ENTRY_POINTS, help = "The modules to import, by default the entry points.")
+    _parser.add_argument("--budget", type = float, default = IMPORT_BUDGET, help = "The largest allowed import time in seconds.")
+    _parser.add_argument("--repeats", type = int, default = 3, help = "The number of measurements per module.")
+    _arguments = _parser.parse_args()
+
+    _violations = []
+    for _module in _arguments.modules:
+        _time, _loaded = measure(_module, _arguments.repeats)
+        print(f"{_module:50s} {_time:8.3f} s")
+        _violations += _violations_of(_module, _time, _loaded, _arguments.budget)
+    for _violation in _violations:
+        print(_violation, file = sys.stderr)
+    sys.exit(1 if _violations else 0)
+
+if __name__ == "__main__":
+    main()
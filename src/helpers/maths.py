@@ -13,6 +13,8 @@
 #  You should have received a copy of the GNU General Public License along with
 #  this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from planck.src.helpers import tables
+import functools
 import numpy
 import typing
 
@@ -48,4 +50,118 @@ def rotation_matrix(axis: list[float], angle: float) -> list[float]:
     )
 
 def gaussian_products(center1: list[float], exponent1: list[float], center2: list[float], exponent2: list[float]) -> typing.Union[list[float], list[list[float]]]:
-    pass
\ No newline at end of file
+    """
+    Applies the Gaussian product theorem to every pair of primitives on two centers.
+
+    The product of two primitive Gaussians exp(-a|r-A|^2) and exp(-b|r-B|^2) is a single Gaussian
+    centered at P = (aA + bB)/(a + b), with exponent p = a + b, scaled by K = exp(-ab/(a + b)|A-B|^2).
+
+    Args:
+    -----
+        center1 (list[float]): Cartesian coordinates [x, y, z] of the first center.
+        exponent1 (list[float]): Primitive exponents on the first center.
+        center2 (list[float]): Cartesian coordinates [x, y, z] of the second center.
+        exponent2 (list[float]): Primitive exponents on the second center.
+
+    Returns:
+    --------
+        tuple: The combined exponents with shape (n1, n2), the product centers with shape (n1, n2, 3)
+               and the pre-exponential factors with shape (n1, n2).
+    """
+    _center1   = numpy.asarray(center1, dtype = float)
+    _center2   = numpy.asarray(center2, dtype = float)
+    _exponent1 = numpy.asarray(exponent1, dtype = float)[:, None]
+    _exponent2 = numpy.asarray(exponent2, dtype = float)[None, :]
+    
+    # Combined exponent, product center and the overlap prefactor
+    _exponent  = _exponent1 + _exponent2
+    _center    = (_exponent1[..., None] * _center1 + _exponent2[..., None] * _center2) / _exponent[..., None]
+    _distance  = numpy.sum((_center1 - _center2)**2)
+    _prefactor = numpy.exp(-_exponent1 * _exponent2 / _exponent * _distance)
+    return _exponent, _center, _prefactor
+
+# Parameters of the tabulated Boys function
+BOYS_GRID_SPACING = 0.05
+BOYS_GRID_MAXIMUM = 45.0
+BOYS_MAX_ORDER    = 40
+BOYS_TAYLOR_TERMS = 7
+
+@functools.lru_cache(maxsize = None)
+def _boys_table() -> numpy.ndarray:
+    """
+    Returns F_m(T) on an evenly spaced grid for use in the Taylor interpolation of `boys`.
+
+    The table is loaded from the precomputed binary tables on first use and cached for the lifetime of the process.
+    It is only recomputed if the stored table does not match the grid parameters.
+
+    Returns:
+    --------
+        numpy.ndarray: An array of shape (ngrid, BOYS_MAX_ORDER + BOYS_TAYLOR_TERMS + 1).
+    """
+    _table = tables.load("boys")
+    if _table.shape != (numpy.arange(0.0, BOYS_GRID_MAXIMUM + 2 * BOYS_GRID_SPACING, BOYS_GRID_SPACING).size, BOYS_MAX_ORDER + BOYS_TAYLOR_TERMS + 1):
+        _table = _compute_boys_table()
+    return _table
+
+def _compute_boys_table() -> numpy.ndarray:
+    """
+    Tabulates F_m(T) on the grid of `_boys_table` from the incomplete gamma function.
+
+    Returns:
+    --------
+        numpy.ndarray: An array of shape (ngrid, BOYS_MAX_ORDER + BOYS_TAYLOR_TERMS + 1).
+    """
+    import scipy.special
+
+    _grid   = numpy.arange(0.0, BOYS_GRID_MAXIMUM + 2 * BOYS_GRID_SPACING, BOYS_GRID_SPACING)
+    _orders = numpy.arange(BOYS_MAX_ORDER + BOYS_TAYLOR_TERMS + 1)[None, :] + 0.5
+    _values = numpy.empty((_grid.size, _orders.size))
+    
+    # F_m(T) = Gamma(m + 1/2) P(m + 1/2, T) / (2 T^(m + 1/2)), with F_m(0) = 1/(2m + 1)
+    with numpy.errstate(divide = "ignore", invalid = "ignore"):
+        _values[1:] = scipy.special.gamma(_orders) * scipy.special.gammainc(_orders, _grid[1:, None]) / (2 * pow(_grid[1:, None], _orders))
+    _values[0]  = 1.0 / (2 * _orders[0])
+    return _values
+
+def boys(order: int, argument: typing.Union[float, list[float]]) -> list[float]:
+    """
+    Evaluates the Boys function F_m(T) for all orders m = 0, ..., order.
+
+    Small arguments are interpolated from a pre-tabulated grid with a Taylor expansion around the nearest
+    grid point, while large arguments use the asymptotic form of F_0 followed by upward recursion.
+
+    Args:
+    -----
+        order (int): The highest order of the Boys function required.
+        argument (Union[float, list[float]]): The argument(s) T at which the function is evaluated.
+
+    Returns:
+    --------
+        numpy.ndarray: An array of shape (order + 1, *argument.shape) holding F_0(T), ..., F_order(T).
+    """
+    if order > BOYS_MAX_ORDER:
+        raise ValueError(f"The Boys function is only tabulated up to order {BOYS_MAX_ORDER}, but order {order} was requested.")
+    
+    _argument = numpy.asarray(argument, dtype = float)
+    _values   = numpy.empty((order + 1,) + _argument.shape)
+    _small    = _argument < BOYS_GRID_MAXIMUM
+    
+    # Taylor expansion around the nearest grid point, F_m(T0 + dT) = sum_k F_(m+k)(T0) (-dT)^k / k!
+    _table  = _boys_table()
+    _index  = numpy.rint(_argument[_small] / BOYS_GRID_SPACING).astype(int)
+    _delta  = _argument[_small] - _index * BOYS_GRID_SPACING
+    _series = numpy.zeros((order + 1, _index.size))
+    _factor = numpy.ones(_index.size)
+    for _k in range(BOYS_TAYLOR_TERMS):
+        _series += _table[_index, _k:_k + order + 1].T * _factor
+        _factor  = -_factor * _delta / (_k + 1)
+    _values[:, _small] = _series
+    
+    # Upward recursion from the asymptotic F_0(T) = sqrt(pi / T) / 2, stable since T exceeds the highest order
+    _large = _argument[~_small]
+    _exp   = numpy.exp(-_large)
+    _term  = 0.5 * numpy.sqrt(numpy.pi / _large)
+    for _m in range(order + 1):
+        _values[_m, ~_small] = _term
+        _term = ((2 * _m + 1) * _term - _exp) / (2 * _large)
+    return _values
\ No newline at end of file
@@ -0,0 +1,105 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+# 
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+# 
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+# 
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.helpers import maths, tables
+import math
+import numpy
+import os
+import typing
+
+# Elements in the order of their atomic numbers, with their standard atomic masses
+ELEMENTS = [
+    ("H",  1.008),   ("He", 4.0026),  ("Li", 6.94),    ("Be", 9.0122),  ("B",  10.81),   ("C",  12.011),
+    ("N",  14.007),  ("O",  15.999),  ("F",  18.998),  ("Ne", 20.180),  ("Na", 22.990),  ("Mg", 24.305),
+    ("Al", 26.982),  ("Si", 28.085),  ("P",  30.974),  ("S",  32.06),   ("Cl", 35.45),   ("Ar", 39.948),
+    ("K",  39.098),  ("Ca", 40.078),  ("Sc", 44.956),  ("Ti", 47.867),  ("V",  50.942),  ("Cr", 51.996),
+    ("Mn", 54.938),  ("Fe", 55.845),  ("Co", 58.933),  ("Ni", 58.693),  ("Cu", 63.546),  ("Zn", 65.38),
+    ("Ga", 69.723),  ("Ge", 72.63),   ("As", 74.922),  ("Se", 78.971),  ("Br", 79.904),  ("Kr", 83.798),
+    ("Rb", 85.468),  ("Sr", 87.62),   ("Y",  88.906),  ("Zr", 91.224),  ("Nb", 92.906),  ("Mo", 95.95),
+    ("Tc", 98),      ("Ru", 101.07),  ("Rh", 102.91),  ("Pd", 106.42),  ("Ag", 107.87),  ("Cd", 112.41),
+    ("In", 114.82),  ("Sn", 118.71),  ("Sb", 121.76),  ("Te", 127.6),   ("I",  126.90),  ("Xe", 131.29),
+    ("Cs", 132.91),  ("Ba", 137.33),  ("La", 138.91),  ("Ce", 140.12),  ("Pr", 140.91),  ("Nd", 144.24),
+    ("Pm", 145),     ("Sm", 150.36),  ("Eu", 151.96),  ("Gd", 157.25),  ("Tb", 158.93),  ("Dy", 162.5),
+    ("Ho", 164.93),  ("Er", 167.26),  ("Tm", 168.93),  ("Yb", 173.05),  ("Lu", 174.97),  ("Hf", 178.49),
+    ("Ta", 180.95),  ("W",  183.84),  ("Re", 186.21),  ("Os", 190.23),  ("Ir", 192.22),  ("Pt", 195.08),
+    ("Au", 196.97),  ("Hg", 200.59),  ("Tl", 204.38),  ("Pb", 207.2),   ("Bi", 208.98),  ("Po", 209),
+    ("At", 210),     ("Rn", 222),     ("Fr", 223),     ("Ra", 226),     ("Ac", 227),     ("Th", 232.04),
+    ("Pa", 231.04),  ("U",  238.03),  ("Np", 237),     ("Pu", 244),     ("Am", 243),     ("Cm", 247),
+    ("Bk", 247),     ("Cf", 251),     ("Es", 252),     ("Fm", 257),     ("Md", 258),     ("No", 259),
+    ("Lr", 262),     ("Rf", 267),     ("Db", 270),     ("Sg", 271),     ("Bh", 270),     ("Hs", 277),
+    ("Mt", 278),     ("Ds", 281),     ("Rg", 282),     ("Cn", 285),     ("Nh", 286),     ("Fl", 289),
+    ("Mc", 290),     ("Lv", 293),     ("Ts", 294),     ("Og", 294),
+]
+
+# Largest argument of the tabulated double factorials, enough for the normalization of any supported shell
+DOUBLE_FACTORIAL_MAXIMUM = 2 * maths.BOYS_MAX_ORDER + 1
+
+def double_factorials(maximum: int = DOUBLE_FACTORIAL_MAXIMUM) -> list[float]:
+    """
+    Tabulates the double factorials n!! = n (n - 2) (n - 4) ... for n = 0, ..., maximum.
+
+    Args:
+    -----
+        maximum (int): The largest tabulated argument.
+
+    Returns:
+    --------
+        numpy.ndarray: An array of length maximum + 1 whose n-th entry is n!!.
+    """
+    return numpy.array([math.prod(range(_n, 0, -2)) for _n in range(maximum + 1)], dtype = float)
+
+def elements() -> numpy.ndarray:
+    """
+    Tabulates the element symbols, atomic numbers and atomic masses.
+
+    Returns:
+    --------
+        numpy.ndarray: A structured array with the fields "symbol", "number" and "mass", one entry per element.
+    """
+    _table = numpy.zeros(len(ELEMENTS), dtype = [("symbol", "U3"), ("number", "i4"), ("mass", "f8")])
+    _table["symbol"] = [_symbol for _symbol, _ in ELEMENTS]
+    _table["number"] = numpy.arange(1, len(ELEMENTS) + 1)
+    _table["mass"]   = [_mass for _, _mass in ELEMENTS]
+    return _table
+
+# The generators of all precomputed tables, keyed by the name of the table
+GENERATORS = {"boys": maths._compute_boys_table, "double_factorials": double_factorials, "elements": elements}
+
+def build(directory: typing.Optional[str] = None) -> list[str]:
+    """
+    Regenerates the precomputed binary tables that are loaded by `tables.load`.
+
+    The tables are stored as NumPy .npy files, which load without parsing or unpickling. They have to be rebuilt
+    whenever the generators or their parameters, e.g. the Boys function grid, change.
+
+    Args:
+    -----
+        directory (Optional[str]): The directory the tables are written to, by default `tables.DATA_DIRECTORY`.
+
+    Returns:
+    --------
+        list[str]: The paths of the written files.
+    """
+    _directory = tables.DATA_DIRECTORY if directory is None else directory
+    os.makedirs(_directory, exist_ok = True)
+    _paths = []
+    for _name, _generator in GENERATORS.items():
+        _paths.append(os.path.join(_directory, f"{_name}.npy"))
+        numpy.save(_paths[-1], _generator(), allow_pickle = False)
+    return _paths
+
+if __name__ == "__main__":
+    for _path in build():
+        print(_path)
@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from planck.src.basis.base import Shell
+from planck.src.geometry.spatial import CellList
+from planck.src.helpers import maths
 import numpy
 import typing
 
@@ -76,3 +79,83 @@ class Integral(ABC):
         list[float]: A list of floating-point values representing the result of the integral evaluation.
         """
         pass
+
+class ShellPair:
+    """
+    A class holding the primitive pair data of two basis functions.
+
+    The Gaussian product theorem is applied once per pair so that the combined exponents, product
+    centers and prefactors can be reused by every integral in which the pair appears.
+
+    Attributes:
+    -----------
+        first (Shell): The basis function on the left of the pair.
+        second (Shell): The basis function on the right of the pair.
+        indices (tuple[int, int]): The basis indices of the two functions.
+        alpha (list[float]): The exponents a of the first function, one per primitive pair.
+        beta (list[float]): The exponents b of the second function, one per primitive pair.
+        exponents (list[float]): The combined exponents p = a + b, one per primitive pair.
+        centers (list[list[float]]): The product centers P, with shape (nprims, 3).
+        coefficients (list[float]): The products of the normalized contraction coefficients
+            and the pre-exponential factors exp(-ab/p |A - B|^2).
+        distance (list[float]): The vector A - B between the two centers.
+        momentum (tuple[int, int]): The total angular momenta of the two functions.
+    """
+    def __init__(self, first: Shell, second: Shell) -> None:
+        self.first   = first
+        self.second  = second
+        self.indices = (first.basisindex, second.basisindex)
+        
+        _exponents, _centers, _prefactors = maths.gaussian_products(first.center, first.exponents, second.center, second.exponents)
+        _weights = numpy.outer(first.coefficients * first.normcoeffs, second.coefficients * second.normcoeffs)
+        
+        self.alpha        = numpy.repeat(first.exponents, second.exponents.size)
+        self.beta         = numpy.tile(second.exponents, first.exponents.size)
+        self.exponents    = _exponents.ravel()
+        self.centers      = _centers.reshape(-1, 3)
+        self.coefficients = (_weights * _prefactors).ravel()
+        self.distance     = first.center - second.center
+        self.momentum     = (first.type.value, second.type.value)
+
+def significant_pairs(basis: list[Shell], threshold: float) -> list[tuple[int, int]]:
+    """
+    Enumerates the basis function pairs (i >= j) whose overlap distribution is not negligible.
+
+    The product of two primitives decays as exp(-ab/(a + b) R^2), so a pair is kept when
+    R^2 < ln(1/threshold) (1/a + 1/b) for the most diffuse exponents a and b of the two functions,
+    i.e. when R^2 < r_i^2 + r_j^2 with the extents r_i^2 = ln(1/threshold)/a_i. Candidate pairs
+    of centers are found with a cell list, so the enumeration scales linearly for extended systems.
+
+    Args:
+    -----
+        basis (list[Shell]): The basis functions.
+        threshold (float): The screening threshold. A value of zero keeps every pair.
+
+    Returns:
+    --------
+        list[tuple[int, int]]: The indices of the significant pairs, sorted.
+    """
+    if threshold <= 0.0:
+        return [(_i, _j) for _i in range(len(basis)) for _j in range(_i + 1)]
+
+    # Squared extents of the functions, and their grouping by center
+    _extents = numpy.array([numpy.log(1.0 / threshold) / numpy.min(_shell.exponents) for _shell in basis])
+    _centers, _owner = numpy.unique(numpy.array([_shell.center for _shell in basis]), axis = 0, return_inverse = True)
+    _owner   = _owner.ravel()
+    _members = [numpy.nonzero(_owner == _c)[0] for _c in range(len(_centers))]
+    _reach   = numpy.array([numpy.max(_extents[_m]) for _m in _members])
+
+    # Two centers can only host a significant pair if they are closer than sqrt(2) times the largest extent
+    _cells = CellList(_centers, numpy.sqrt(2.0 * numpy.max(_reach)))
+    _pairs = []
+    for _c1, _c2 in zip(*_cells.pairs()):
+        _distance = numpy.sum((_centers[_c1] - _centers[_c2])**2)
+        if _distance >= _reach[_c1] + _reach[_c2]:
+            continue
+        _i, _j = numpy.meshgrid(_members[_c1], _members[_c2], indexing = "ij")
+        _keep  = (_distance < _extents[_i] + _extents[_j]) & (_i >= _j)
+        _pairs.extend(zip(_i[_keep].tolist(), _j[_keep].tolist()))
+        if _c1 != _c2:
+            _keep = (_distance < _extents[_i] + _extents[_j]) & (_j > _i)
+            _pairs.extend(zip(_j[_keep].tolist(), _i[_keep].tolist()))
+    return sorted(_pairs)
@@ -0,0 +1,135 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.integrals.twoelectron import TwoElectronIntegral
+import numpy
+
+class CholeskyERI:
+    """
+    Pivoted Cholesky decomposition of the ERI matrix, (ij|kl) ~ sum_P L^P_ij L^P_kl.
+
+    The ERI matrix over packed function pairs (i >= j) is positive semidefinite, so it can be decomposed
+    with a pivoted incomplete Cholesky factorization, which stops as soon as the largest remaining diagonal
+    element (ij|ij) - sum_P (L^P_ij)^2 is below the threshold. Since every element of the residual matrix is
+    bounded by its diagonal, the threshold bounds the error of every integral. Only the diagonal and the
+    columns of the chosen pivots are computed: the pivot with the largest residual diagonal selects a shell
+    block pair, all its columns are evaluated at once, and every function pair of the block whose residual
+    diagonal is still above the threshold and a fraction `span` of the largest one becomes a pivot in turn.
+
+    Attributes:
+    -----------
+        eri (TwoElectronIntegral): The integral driver that evaluates the diagonal and the columns.
+        threshold (float): The largest allowed residual diagonal element.
+        nbasis (int): The number of basis functions.
+        vectors (numpy.ndarray): The Cholesky vectors L^P_ij with shape (nvectors, nbasis, nbasis), symmetric in i and j.
+        error (float): The largest residual diagonal element, an upper bound for the error of any integral.
+    """
+    def __init__(self, eri: TwoElectronIntegral, threshold: float = 1e-6, span: float = 1e-2) -> None:
+        self.eri       = eri
+        self.threshold = threshold
+        self.nbasis    = eri.nbasis
+        if not self.eri.shellpairs:
+            self.eri.create_shellpairs()
+            self.eri.sort_shellpairs()
+
+        _offsets = numpy.cumsum([0] + [_matrix.shape[0] for _matrix in self.eri.matrices])
+        _bounds  = self.eri.schwarz()
+        _blockpairs = [(_I, _J) for _I in range(len(self.eri.blocks)) for _J in range(_I + 1) if _bounds[_I, _J] > 0.0]
+
+        # Packed pair index i(i + 1)/2 + j of every function pair (i >= j) of every block pair
+        _members = []
+        _owners  = numpy.full(self.nbasis * (self.nbasis + 1) // 2, -1)
+        for _index, (_I, _J) in enumerate(_blockpairs):
+            _i, _j = numpy.meshgrid(numpy.arange(_offsets[_I], _offsets[_I + 1]), numpy.arange(_offsets[_J], _offsets[_J + 1]), indexing = "ij")
+            _keep  = _i >= _j
+            _members.append((numpy.nonzero(_keep.ravel())[0], _i[_keep] * (_i[_keep] + 1) // 2 + _j[_keep]))
+            _owners[_members[-1][1]] = _index
+
+        # Diagonal (ij|ij) of the packed ERI matrix
+        _diagonal = numpy.zeros(_owners.size)
+        for (_I, _J), (_local, _packed) in zip(_blockpairs, _members):
+            _diagonal[_packed] = numpy.einsum("ijij->ij", self.eri.block(_I, _J, _I, _J)).ravel()[_local]
+
+        _vectors = numpy.zeros((0, _owners.size))
+        while numpy.max(_diagonal, initial = 0.0) > threshold:
+            _largest = numpy.max(_diagonal)
+            _K, _L   = _blockpairs[_owners[numpy.argmax(_diagonal)]]
+            _local, _candidates = _members[_owners[numpy.argmax(_diagonal)]]
+
+            # All columns (ij|kl) of the pivot block pair, minus the part already described by the vectors
+            _columns = numpy.zeros((_owners.size, len(_candidates)))
+            for (_I, _J), (_rows, _packed) in zip(_blockpairs, _members):
+                if _bounds[_I, _J] * _bounds[_K, _L] < 1e-3 * threshold:
+                    continue
+                _block = self.eri.block(_I, _J, _K, _L)
+                _block = _block.reshape(_block.shape[0] * _block.shape[1], -1)
+                _columns[_packed] = _block[numpy.ix_(_rows, _local)]
+            _columns -= _vectors.T @ _vectors[:, _candidates]
+
+            # Cholesky steps over the qualifying pairs of the block, largest residual diagonal first
+            _new = []
+            while True:
+                _residual = _diagonal[_candidates]
+                _pivot    = numpy.argmax(_residual)
+                if _residual[_pivot] <= max(threshold, span * _largest):
+                    break
+                _vector = _columns[:, _pivot] / numpy.sqrt(_residual[_pivot])
+                _columns  -= numpy.outer(_vector, _vector[_candidates])
+                _diagonal -= _vector**2
+                _diagonal[_candidates[_pivot]] = 0.0
+                _new.append(_vector)
+            _vectors  = numpy.vstack([_vectors] + _new)
+            _diagonal = numpy.maximum(_diagonal, 0.0)
+
+        # Unpack the vectors to symmetric matrices
+        _rows, _cols = numpy.tril_indices(self.nbasis)
+        self.vectors = numpy.zeros((_vectors.shape[0], self.nbasis, self.nbasis))
+        self.vectors[:, _rows, _cols] = _vectors
+        self.vectors[:, _cols, _rows] = _vectors
+        self.error   = float(numpy.max(_diagonal, initial = 0.0))
+
+    def jk(self, density: list[list[float]]) -> tuple[list[list[float]], list[list[float]]]:
+        """
+        Builds the Coulomb and exchange matrices from the Cholesky vectors.
+
+        J_ij = sum_P L^P_ij (sum_kl L^P_kl D_kl) costs O(N^2 N_chol), and K = sum_P L^P D L^P costs O(N^3 N_chol).
+
+        Args:
+        -----
+            density (numpy.ndarray): The density matrix D.
+
+        Returns:
+        --------
+            tuple: The Coulomb matrix J and the exchange matrix K.
+        """
+        _density = numpy.asarray(density, dtype = float)
+        _coulomb  = numpy.einsum("pij,p->ij", self.vectors, numpy.einsum("pkl,kl->p", self.vectors, _density))
+        _exchange = numpy.einsum("pij,pjl->il", self.vectors @ _density, self.vectors)
+        return _coulomb, _exchange
+
+    def transform(self, left: list[list[float]], right: list[list[float]]) -> list[list[list[float]]]:
+        """
+        Transforms the Cholesky vectors to molecular orbitals, B^P_ia = sum_jk C_ji L^P_jk C'_ka.
+
+        Args:
+        -----
+            left (numpy.ndarray): The orbital coefficients of the first index, one orbital per column.
+            right (numpy.ndarray): The orbital coefficients of the second index.
+
+        Returns:
+        --------
+            numpy.ndarray: The transformed vectors with shape (nvectors, nleft, nright).
+        """
+        return numpy.einsum("ji,pjk,ka->pia", left, self.vectors, right, optimize = True)
@@ -0,0 +1,404 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.geometry.spatial import CellList
+from planck.src.integrals.base import ShellPair
+from planck.src.integrals.oneelectron import OneElectronIntegral
+from planck.src.integrals.twoelectron import TwoElectronIntegral
+import functools
+import math
+import numpy
+import typing
+
+def multipole_components(order: int) -> list[tuple[int, int, int]]:
+    """
+    Returns the Cartesian multi-indices (t, u, v) with t + u + v <= order, ordered by increasing rank.
+    """
+    return [(_t, _u, _n - _t - _u) for _n in range(order + 1) for _t in range(_n, -1, -1) for _u in range(_n - _t, -1, -1)]
+
+def pair_moments(pair: ShellPair, center: list[float], order: int) -> list[float]:
+    """
+    Computes the Cartesian multipole moments of the product of two basis functions.
+
+    The moments M_(tuv) = <i|(x - Cx)^t (y - Cy)^u (z - Cz)^v|j> are evaluated per direction by expanding
+    (x - Cx)^t = sum_s binom(t, s) (Ax - Cx)^(t - s) (x - Ax)^s, which raises the angular momentum of the
+    first function, so only one-dimensional overlap factors are needed.
+
+    Args:
+    -----
+        pair (ShellPair): The pair of basis functions.
+        center (list[float]): The expansion center C.
+        order (int): The highest rank of the moments.
+
+    Returns:
+    --------
+        numpy.ndarray: The moments, ordered as `multipole_components(order)`.
+    """
+    _a, _b    = pair.first.shell, pair.second.shell
+    _shift    = pair.first.center - numpy.asarray(center, dtype = float)
+    _factors  = []
+    for _x in range(3):
+        _overlap = OneElectronIntegral._overlap_1d(pair, _x, _a[_x] + order, _b[_x])[:, _b[_x]]
+        _factors.append([sum(math.comb(_t, _s) * pow(_shift[_x], _t - _s) * _overlap[_a[_x] + _s] for _s in range(_t + 1)) for _t in range(order + 1)])
+
+    _weights = pair.coefficients * pow(numpy.pi / pair.exponents, 1.5)
+    return numpy.array([numpy.sum(_weights * _factors[0][_t] * _factors[1][_u] * _factors[2][_v]) for _t, _u, _v in multipole_components(order)])
+
+def translate(moments: list[float], shift: list[float], order: int) -> list[float]:
+    """
+    Translates Cartesian multipole moments to a new expansion center.
+
+    With r - C' = (r - C) + d, where d = C - C', the moments about C' follow from the binomial expansion
+    M'_(tuv) = sum binom(t, t') binom(u, u') binom(v, v') d_x^(t - t') d_y^(u - u') d_z^(v - v') M_(t'u'v').
+
+    Args:
+    -----
+        moments (numpy.ndarray): The moments about C, with the components along the last axis.
+        shift (list[float]): The vectors d = C - C', with shape (..., 3).
+        order (int): The highest rank of the moments.
+
+    Returns:
+    --------
+        numpy.ndarray: The moments about C'.
+    """
+    _components = multipole_components(order)
+    _index      = {_component: _i for _i, _component in enumerate(_components)}
+    _shift      = numpy.asarray(shift, dtype = float)
+    _result     = numpy.zeros_like(moments)
+    for _i, (_t, _u, _v) in enumerate(_components):
+        for _t1 in range(_t + 1):
+            for _u1 in range(_u + 1):
+                for _v1 in range(_v + 1):
+                    _factor = math.comb(_t, _t1) * math.comb(_u, _u1) * math.comb(_v, _v1) * _shift[..., 0]**(_t - _t1) * _shift[..., 1]**(_u - _u1) * _shift[..., 2]**(_v - _v1)
+                    _result[..., _i] += _factor * moments[..., _index[(_t1, _u1, _v1)]]
+    return _result
+
+def derivatives(distance: list[float], rank: int) -> list[float]:
+    """
+    Evaluates the Cartesian derivatives d^(tuv)(1/R) of the inverse distance up to a given rank.
+
+    The derivatives follow from the McMurchie-Davidson recurrence in the point charge limit,
+    R^(n)_(t + 1, u, v) = t R^(n + 1)_(t - 1, u, v) + X R^(n + 1)_(t, u, v), with R^(n)_(000) = (-1)^n (2n - 1)!! / R^(2n + 1).
+
+    Args:
+    -----
+        distance (numpy.ndarray): The vectors R, with shape (..., 3).
+        rank (int): The highest rank t + u + v of the derivatives.
+
+    Returns:
+    --------
+        numpy.ndarray: The derivatives with shape (..., ncomponents), ordered as `multipole_components(rank)`.
+    """
+    _distance = numpy.asarray(distance, dtype = float)
+    _norm     = numpy.sqrt(numpy.sum(_distance**2, axis = -1))
+    _cache    = {}
+
+    def _derivative(t: int, u: int, v: int, n: int) -> list[float]:
+        _key = (t, u, v, n)
+        if _key in _cache:
+            return _cache[_key]
+        if t == u == v == 0:
+            _value = pow(-1, n) * float(math.prod(range(2 * n - 1, 0, -2))) / _norm**(2 * n + 1)
+        elif t > 0:
+            _value = _distance[..., 0] * _derivative(t - 1, u, v, n + 1) + ((t - 1) * _derivative(t - 2, u, v, n + 1) if t > 1 else 0.0)
+        elif u > 0:
+            _value = _distance[..., 1] * _derivative(t, u - 1, v, n + 1) + ((u - 1) * _derivative(t, u - 2, v, n + 1) if u > 1 else 0.0)
+        else:
+            _value = _distance[..., 2] * _derivative(t, u, v - 1, n + 1) + ((v - 1) * _derivative(t, u, v - 2, n + 1) if v > 1 else 0.0)
+        _cache[_key] = _value
+        return _value
+
+    return numpy.stack([_derivative(_t, _u, _v, 0) for _t, _u, _v in multipole_components(rank)], axis = -1)
+
+def interaction(distance: list[float], order: int) -> list[list[float]]:
+    """
+    Builds the interaction matrix between Cartesian multipole moments of two separated distributions.
+
+    Expanding 1/|R + a - b| around R in both a and b gives the Coulomb energy of two distributions as
+    sum_(alpha, beta) M1_alpha G_(alpha, beta) M2_beta with G_(alpha, beta) = (-1)^|beta| d^(alpha + beta)(1/R) / (alpha! beta!),
+    the derivatives being those of `derivatives`.
+
+    Args:
+    -----
+        distance (numpy.ndarray): The vectors R between the two expansion centers, with shape (..., 3).
+        order (int): The highest rank of the moments of either distribution.
+
+    Returns:
+    --------
+        numpy.ndarray: The interaction matrices with shape (..., ncomponents, ncomponents).
+    """
+    _index, _first, _second = _interaction_table(order)
+    return derivatives(distance, 2 * order)[..., _index] * (_first[:, None] * _second[None, :])
+
+def interact(distance: list[float], order: int, moments: list[list[float]], transposed: list[list[float]]) -> tuple[list[list[float]], list[list[float]]]:
+    """
+    Applies the interaction matrices of `interaction` and their transposes to moments, without building the matrices.
+
+    Since G_(alpha, beta) factors into 1/alpha!, d^(alpha + beta)(1/R) and (-1)^|beta| / beta!, and G(-R) is the transpose
+    of G(R), one pass over the columns of the derivatives gives the local expansions at both ends of every interaction.
+
+    Args:
+    -----
+        distance (numpy.ndarray): The vectors R between the two expansion centers, with shape (ninteractions, 3).
+        order (int): The highest rank of the moments of either distribution.
+        moments (numpy.ndarray): The moments M of the sources, with shape (ninteractions, ncomponents).
+        transposed (numpy.ndarray): The moments N of the bras, with shape (ninteractions, ncomponents).
+
+    Returns:
+    --------
+        tuple: The products G(R) M and G(R)^T N, with shape (ninteractions, ncomponents).
+    """
+    # Components along the first axis, so that every column gathers whole rows of derivatives
+    _index, _first, _second = _interaction_table(order)
+    _derivatives = numpy.ascontiguousarray(derivatives(distance, 2 * order).T)
+    _moments     = (numpy.asarray(moments) * _second).T
+    _transposed  = (numpy.asarray(transposed) * _first).T
+    _forward, _backward = numpy.zeros(_moments.shape), numpy.zeros(_transposed.shape)
+    for _beta in range(_index.shape[1]):
+        _column     = _derivatives[_index[:, _beta]]
+        _forward   += _column * _moments[_beta]
+        _backward  += _column * _transposed[_beta]
+    return (_forward.T * _first), (_backward.T * _second)
+
+@functools.lru_cache(maxsize = None)
+def _interaction_table(order: int) -> tuple[list[list[int]], list[float], list[float]]:
+    """
+    Returns, for every pair of moments (alpha, beta), the position of d^(alpha + beta) among the derivatives of
+    rank up to 2 * order, and the factors 1/alpha! and (-1)^|beta| / beta! of the interaction matrix.
+    """
+    _components = multipole_components(order)
+    _position   = {_component: _i for _i, _component in enumerate(multipole_components(2 * order))}
+    _factorials = numpy.array([math.factorial(_t) * math.factorial(_u) * math.factorial(_v) for _t, _u, _v in _components], dtype = float)
+    _signs      = numpy.array([pow(-1, sum(_beta)) for _beta in _components], dtype = float)
+    _index      = numpy.array([[_position[(_alpha[0] + _beta[0], _alpha[1] + _beta[1], _alpha[2] + _beta[2])] for _beta in _components] for _alpha in _components])
+    return _index, 1.0 / _factorials, _signs / _factorials
+
+class MultipoleCoulomb:
+    """
+    Multipole accelerated Coulomb (J) matrix builder with a near-field / far-field split.
+
+    Every significant pair of shell blocks defines a charge distribution with a center and an extent
+    beyond which it is negligible. The ket distributions are sorted into the cells of a cell list and
+    their density weighted multipole moments are aggregated per cell. A bra distribution interacts with
+    a whole cell through its multipole expansion when the cell is well separated from it, with a single
+    ket distribution of a nearby cell when the two do not overlap, and only the remaining near-field
+    block quartets are computed exactly. Two distributions that interact directly share one evaluation,
+    which gives the local expansions of both. The classification depends only on the geometry and is made
+    once, so every SCF iteration only rebuilds the density weighted moments.
+
+    Attributes:
+    -----------
+        eri (TwoElectronIntegral): The ERI driver used for the exact near-field quartets.
+        order (int): The highest rank of the multipole moments.
+        separation (float): The ratio of center distance to summed extents beyond which two distributions are far apart.
+        cellsize (float): The edge length of the cells, by default half the mean extent of the distributions.
+        batch (int): The number of far-field interactions evaluated at once.
+        blockpairs (list[tuple[int, int]]): The significant block pairs (I >= J).
+        centers (numpy.ndarray): The expansion center of every block pair.
+        extents (numpy.ndarray): The extent of every block pair.
+        moments (list[numpy.ndarray]): The moments of every block pair, with shape (ncomponents, nI, nJ).
+        farbras (numpy.ndarray): The bra distribution of every far-field interaction.
+        farsources (numpy.ndarray): The source of every far-field interaction, a distribution index or, offset by
+            the number of distributions, a cell index.
+        fardistances (numpy.ndarray): The vectors from the source to the bra center of every far-field interaction.
+        farmutual (numpy.ndarray): Whether a far-field interaction between two distributions also gives the local
+            expansion of the source, which it does when neither sees the other through a cell.
+        nearfield (dict[tuple[int, int], tuple[bool, bool]]): The exactly computed pairs of block pairs (b, k), b >= k,
+            with flags telling whether their Coulomb contribution to b and to k is needed.
+    """
+    def __init__(self, eri: TwoElectronIntegral, order: int = 6, separation: float = 1.0, cellsize: typing.Optional[float] = None, threshold: float = 1e-10,
+                 batch: int = 256) -> None:
+        self.eri        = eri
+        self.order      = order
+        self.separation = separation
+        self.batch      = batch
+        if not self.eri.shellpairs:
+            self.eri.create_shellpairs()
+            self.eri.sort_shellpairs()
+
+        _bounds = self.eri.schwarz()
+        self.blockpairs = [(_I, _J) for _I in range(len(self.eri.blocks)) for _J in range(_I + 1) if _bounds[_I, _J] > 0.0]
+        self.centers    = numpy.zeros((len(self.blockpairs), 3))
+        self.extents    = numpy.zeros(len(self.blockpairs))
+        self.moments    = []
+        for _b, (_I, _J) in enumerate(self.blockpairs):
+            self.centers[_b], self.extents[_b] = self._distribution(_I, _J, threshold)
+            self.moments.append(self._block_moments(_I, _J, self.centers[_b]))
+
+        # Sort the distributions into cells, the radius of a cell covers the extents of all its members. Cells smaller
+        # than the distributions keep the cell radii close to the extents, so that cells can be far from a distribution
+        self.cellsize = 0.5 * float(numpy.mean(self.extents)) if cellsize is None else cellsize
+        self.cells    = CellList(self.centers, self.cellsize)
+        self.cellkeys = list(self.cells.members)
+        self.cellcenters = numpy.array([numpy.mean(self.centers[self.cells.members[_key]], axis = 0) for _key in self.cellkeys])
+        self.cellradii   = numpy.array([numpy.max(numpy.linalg.norm(self.centers[self.cells.members[_key]] - _center, axis = 1) + self.extents[self.cells.members[_key]])
+                                        for _key, _center in zip(self.cellkeys, self.cellcenters)])
+        self._classify()
+
+    def _distribution(self, I: int, J: int, threshold: float) -> tuple[list[float], float]:
+        """
+        Returns the expansion center and the extent of the charge distribution of a block pair.
+
+        The center is the product center of the most diffuse primitives. The extent is the largest distance
+        from it at which any primitive product, exp(-p |r - P|^2) times its polynomial prefactor, exceeds the threshold.
+        """
+        _first, _second = self.eri.basis[self.eri.blocks[I][0]], self.eri.basis[self.eri.blocks[J][0]]
+        _pair    = ShellPair(_first, _second)
+        _diffuse = numpy.argmin(_pair.exponents)
+        _center  = _pair.centers[_diffuse]
+        _radius  = numpy.sqrt(numpy.log(1.0 / threshold) / _pair.exponents) + numpy.sqrt((_first.type.value + _second.type.value) / (2 * _pair.exponents))
+        return _center, float(numpy.max(numpy.linalg.norm(_pair.centers - _center, axis = 1) + _radius))
+
+    def _block_moments(self, I: int, J: int, center: list[float]) -> list[list[list[float]]]:
+        """
+        Computes the multipole moments of all function products of a block pair, transformed to spherical functions if requested.
+        """
+        _moments = numpy.zeros((len(multipole_components(self.order)), len(self.eri.blocks[I]), len(self.eri.blocks[J])))
+        for _a, _i in enumerate(self.eri.blocks[I]):
+            for _b, _j in enumerate(self.eri.blocks[J]):
+                _key = (max(_i, _j), min(_i, _j))
+                if _key in self.eri.pairs:
+                    _moments[:, _a, _b] = pair_moments(self.eri.pairs[_key], center, self.order)
+        return numpy.einsum("ai,bj,nij->nab", self.eri.matrices[I], self.eri.matrices[J], _moments)
+
+    def _separated(self, first: list[float], second: list[float], extent: list[float]) -> list[bool]:
+        """
+        Tells whether distributions at `first` and `second` with summed extents `extent` are well separated.
+        """
+        return numpy.linalg.norm(numpy.asarray(first) - numpy.asarray(second), axis = -1) > self.separation * extent
+
+    def _classify(self) -> None:
+        """
+        Splits the interactions of every bra distribution into far cells, far single distributions and near-field quartets.
+        """
+        # Far-field sources are numbered as the distributions followed by the cells
+        _bras, _sources = [], []
+        _near    = [set() for _ in self.blockpairs]
+        _cellof  = numpy.zeros(len(self.blockpairs), dtype = int)
+        _farcell = numpy.zeros((len(self.blockpairs), len(self.cellkeys)), dtype = bool)
+        for _c, _key in enumerate(self.cellkeys):
+            _cellof[self.cells.members[_key]] = _c
+        for _b in range(len(self.blockpairs)):
+            _farcell[_b] = self._separated(self.centers[_b], self.cellcenters, self.extents[_b] + self.cellradii)
+            _candidates = numpy.concatenate([self.cells.members[self.cellkeys[_c]] for _c in numpy.nonzero(~_farcell[_b])[0]])
+            _farpair    = self._separated(self.centers[_b], self.centers[_candidates], self.extents[_b] + self.extents[_candidates])
+            _far        = numpy.concatenate([_candidates[_farpair], len(self.blockpairs) + numpy.nonzero(_farcell[_b])[0]])
+            _bras.append(numpy.full(_far.size, _b))
+            _sources.append(_far)
+            _near[_b].update(_candidates[~_farpair].tolist())
+
+        _bras, _sources = numpy.concatenate(_bras).astype(int), numpy.concatenate(_sources).astype(int)
+
+        # Two distributions that see each other directly share one interaction, G(-R) being the transpose of G(R)
+        _pair   = _sources < len(self.blockpairs)
+        _mutual = numpy.zeros(_sources.size, dtype = bool)
+        _mutual[_pair] = ~_farcell[_sources[_pair], _cellof[_bras[_pair]]]
+        _keep   = ~_mutual | (_sources < _bras)
+        self.farbras    = _bras[_keep]
+        self.farsources = _sources[_keep]
+        self.farmutual  = _mutual[_keep]
+        self.fardistances = self.centers[self.farbras] - numpy.concatenate([self.centers, self.cellcenters])[self.farsources]
+
+        # Evaluate every near-field block quartet once and let it contribute to both of its distributions when needed
+        _quartets = sorted({(max(_b, _k), min(_b, _k)) for _b in range(len(self.blockpairs)) for _k in _near[_b]})
+        self.nearfield = {(_b, _k): (_k in _near[_b], _b in _near[_k]) for _b, _k in _quartets}
+
+    def _slices(self) -> list[slice]:
+        """
+        Returns the slices of the shell blocks in the (spherical) basis.
+        """
+        _offsets = numpy.cumsum([0] + [_matrix.shape[0] for _matrix in self.eri.matrices])
+        return [slice(_offsets[_X], _offsets[_X + 1]) for _X in range(len(self.eri.blocks))]
+
+    def _pairdensity(self, density: list[list[float]]) -> list[list[list[float]]]:
+        """
+        Returns the density of every block pair summed over both orderings, D_KL + D_LK^T for K != L.
+        """
+        _slices = self._slices()
+        return [density[_slices[_K], _slices[_L]] + (density[_slices[_L], _slices[_K]].T if _K != _L else 0.0) for _K, _L in self.blockpairs]
+
+    def farfield(self, density: list[list[float]]) -> list[list[float]]:
+        """
+        Builds the far-field part of the Coulomb matrix from the multipole expansions.
+
+        Args:
+        -----
+            density (numpy.ndarray): The density matrix D.
+
+        Returns:
+        --------
+            numpy.ndarray: The far-field Coulomb matrix, symmetric.
+        """
+        _slices  = self._slices()
+        _density = numpy.asarray(density, dtype = float)
+        _coulomb = numpy.zeros_like(_density)
+
+        # Density weighted moments of every distribution, and their sum per cell about the cell center
+        _weighted = numpy.array([numpy.einsum("nkl,kl->n", _moments, _pd) for _moments, _pd in zip(self.moments, self._pairdensity(_density))])
+        _cellmoments = numpy.zeros((len(self.cellkeys), _weighted.shape[1]))
+        for _c, _key in enumerate(self.cellkeys):
+            _members = self.cells.members[_key]
+            _cellmoments[_c] = numpy.sum(translate(_weighted[_members], self.centers[_members] - self.cellcenters[_c], self.order), axis = 0)
+
+        # The local expansion of every bra distribution, accumulated in batches of interactions
+        _sources = numpy.concatenate([_weighted, _cellmoments])
+        _local   = numpy.zeros((len(self.blockpairs), _weighted.shape[1]))
+        for _start in range(0, self.farbras.size, self.batch):
+            _batch    = slice(_start, _start + self.batch)
+            _bras     = self.farbras[_batch]
+            _others   = self.farsources[_batch]
+            _mutual   = self.farmutual[_batch]
+            _forward, _backward = interact(self.fardistances[_batch], self.order, _sources[_others], _weighted[_bras] * _mutual[:, None])
+            numpy.add.at(_local, _bras, _forward)
+            numpy.add.at(_local, _others[_mutual], _backward[_mutual])
+
+        for _b, (_I, _J) in enumerate(self.blockpairs):
+            _coulomb[_slices[_I], _slices[_J]] = numpy.einsum("nij,n->ij", self.moments[_b], _local[_b])
+            if _I != _J:
+                _coulomb[_slices[_J], _slices[_I]] = _coulomb[_slices[_I], _slices[_J]].T
+        return _coulomb
+
+    def coulomb(self, density: list[list[float]]) -> list[list[float]]:
+        """
+        Builds the Coulomb matrix J_ij = sum_kl (ij|kl) D_kl, with the near-field block quartets computed exactly.
+
+        When the exchange matrix is needed as well, pass `nearfield` to `TwoElectronIntegral.jk` instead and
+        add `farfield`, so that the near-field quartets are evaluated only once.
+
+        Args:
+        -----
+            density (numpy.ndarray): The density matrix D.
+
+        Returns:
+        --------
+            numpy.ndarray: The Coulomb matrix J.
+        """
+        _slices      = self._slices()
+        _density     = numpy.asarray(density, dtype = float)
+        _pairdensity = self._pairdensity(_density)
+        _coulomb     = numpy.zeros_like(_density)
+        for (_b, _k), (_to_bra, _to_ket) in self.nearfield.items():
+            (_I, _J), (_K, _L) = self.blockpairs[_b], self.blockpairs[_k]
+            _values = self.eri.fetch(_I, _J, _K, _L)
+            if _to_bra:
+                _coulomb[_slices[_I], _slices[_J]] += numpy.einsum("ijkl,kl->ij", _values, _pairdensity[_k])
+            if _to_ket and _b != _k:
+                _coulomb[_slices[_K], _slices[_L]] += numpy.einsum("ijkl,ij->kl", _values, _pairdensity[_b])
+
+        # Only the blocks I >= J were built, mirror them to the upper triangle
+        for _I, _J in self.blockpairs:
+            if _I != _J:
+                _coulomb[_slices[_J], _slices[_I]] = _coulomb[_slices[_I], _slices[_J]].T
+        return _coulomb + self.farfield(_density)
@@ -1 +1,200 @@
-import numpy
\ No newline at end of file
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from abc import abstractmethod
+from planck.src.basis.base import Shell
+from planck.src.basis.spherical import transform
+from planck.src.helpers import maths
+from planck.src.integrals.base import Integral, ShellPair, significant_pairs
+import numpy
+
+class OneElectronIntegral(Integral):
+    """
+    Common driver for the one-electron integrals.
+
+    The driver builds the significant shell pairs (i >= j), evaluates every pair with `pair`, which
+    subclasses implement, fills the symmetric matrix and transforms it to spherical functions if requested.
+
+    Attributes:
+    -----------
+        basis (list[Shell]): The basis functions, indexed by their position in the list.
+        spherical (bool): Whether the integrals are returned over spherical (pure) functions.
+        threshold (float): The overlap threshold below which shell pairs are neglected.
+        shellpairs (list[ShellPair]): The shell pairs, created by `create_shellpairs`.
+    """
+    def __init__(self, basis: list[Shell], spherical: bool = False, threshold: float = 1e-14) -> None:
+        self.basis      = basis
+        self.spherical  = spherical
+        self.threshold  = threshold
+        self.shellpairs = []
+        for _index, _shell in enumerate(self.basis):
+            _shell.basisindex = _index
+
+    def create_shellpairs(self) -> None:
+        """
+        Creates the significant shell pairs (i >= j) of the basis.
+        """
+        self.shellpairs = [ShellPair(self.basis[_i], self.basis[_j]) for _i, _j in significant_pairs(self.basis, self.threshold)]
+
+    def sort_shellpairs(self) -> None:
+        """
+        Sorts the shell pairs by angular momentum class.
+        """
+        self.shellpairs.sort(key = lambda pair: (sum(pair.momentum), pair.momentum))
+
+    @abstractmethod
+    def pair(self, pair: ShellPair) -> float:
+        """
+        Evaluates the contracted integral <i|O|j> for a shell pair.
+        """
+        pass
+
+    def evaluate(self) -> list[list[float]]:
+        """
+        Evaluates the integral matrix over the basis functions.
+
+        Returns:
+        --------
+            numpy.ndarray: The symmetric integral matrix with shape (nbasis, nbasis).
+        """
+        if not self.shellpairs:
+            self.create_shellpairs()
+            self.sort_shellpairs()
+
+        _matrix = numpy.zeros((len(self.basis), len(self.basis)))
+        for _pair in self.shellpairs:
+            _i, _j = _pair.indices
+            _matrix[_i, _j] = _matrix[_j, _i] = self.pair(_pair)
+        return transform(_matrix, self.basis, self.spherical)
+
+    @staticmethod
+    def _overlap_1d(pair: ShellPair, direction: int, amax: int, bmax: int) -> list[list[list[float]]]:
+        """
+        Builds the one-dimensional overlap factors S(i, j), i <= amax and j <= bmax, for every primitive pair.
+
+        The factors follow from the Obara-Saika recurrence
+            S(i + 1, j) = PA S(i, j) + (i S(i - 1, j) + j S(i, j - 1)) / 2p
+            S(i, j + 1) = PB S(i, j) + (i S(i - 1, j) + j S(i, j - 1)) / 2p
+        with S(0, 0) = 1, the Gaussian prefactors being applied by the caller.
+        """
+        _PA = pair.centers[:, direction] - pair.first.center[direction]
+        _PB = pair.centers[:, direction] - pair.second.center[direction]
+        _S  = numpy.zeros((amax + 1, bmax + 1, pair.exponents.size))
+        _S[0, 0] = 1.0
+        for _i in range(amax + 1):
+            for _j in range(bmax + 1):
+                if _i == 0 and _j == 0:
+                    continue
+                if _i > 0:
+                    _value = _PA * _S[_i - 1, _j]
+                    _lower = (_i - 1) * _S[_i - 2, _j] if _i > 1 else 0.0
+                    _lower = _lower + (_j * _S[_i - 1, _j - 1] if _j > 0 else 0.0)
+                else:
+                    _value = _PB * _S[_i, _j - 1]
+                    _lower = (_j - 1) * _S[_i, _j - 2] if _j > 1 else 0.0
+                _S[_i, _j] = _value + _lower / (2 * pair.exponents)
+        return _S
+
+class Overlap(OneElectronIntegral):
+    """
+    Overlap integrals <i|j>.
+    """
+    def pair(self, pair: ShellPair) -> float:
+        _a, _b  = pair.first.shell, pair.second.shell
+        _result = pair.coefficients * pow(numpy.pi / pair.exponents, 1.5)
+        for _x in range(3):
+            _result = _result * self._overlap_1d(pair, _x, _a[_x], _b[_x])[_a[_x], _b[_x]]
+        return float(numpy.sum(_result))
+
+class Kinetic(OneElectronIntegral):
+    """
+    Kinetic energy integrals <i|-1/2 nabla^2|j>.
+
+    The Laplacian acting on the second function is expanded along every direction as
+    d^2/dx^2 x^l exp(-b x^2) = [l(l - 1) x^(l - 2) - 2b(2l + 1) x^l + 4b^2 x^(l + 2)] exp(-b x^2),
+    so the integrals reduce to one-dimensional overlap factors.
+    """
+    def pair(self, pair: ShellPair) -> float:
+        _a, _b     = pair.first.shell, pair.second.shell
+        _overlaps  = [self._overlap_1d(pair, _x, _a[_x], _b[_x] + 2) for _x in range(3)]
+        _diagonal  = [_overlaps[_x][_a[_x], _b[_x]] for _x in range(3)]
+        _result    = 0.0
+        for _x in range(3):
+            _l = _b[_x]
+            _laplacian = -2 * pair.beta * (2 * _l + 1) * _overlaps[_x][_a[_x], _l] + 4 * pair.beta**2 * _overlaps[_x][_a[_x], _l + 2]
+            if _l > 1:
+                _laplacian = _laplacian + _l * (_l - 1) * _overlaps[_x][_a[_x], _l - 2]
+            _result = _result - 0.5 * _laplacian * _diagonal[(_x + 1) % 3] * _diagonal[(_x + 2) % 3]
+        return float(numpy.sum(_result * pair.coefficients * pow(numpy.pi / pair.exponents, 1.5)))
+
+class NuclearAttraction(OneElectronIntegral):
+    """
+    Nuclear attraction integrals <i| -sum_C Z_C / |r - C| |j>.
+
+    The auxiliary integrals Theta(a, 0)^(m) follow from the Obara-Saika vertical recurrence, vectorized over
+    primitive pairs and nuclei, and the angular momentum is transferred to the second function with the
+    horizontal recurrence Theta(a, b + 1i) = Theta(a + 1i, b) + (A - B)_i Theta(a, b).
+
+    Attributes:
+    -----------
+        charges (numpy.ndarray): The nuclear charges Z_C.
+        coords (numpy.ndarray): The nuclear positions in bohr, with shape (ncenters, 3).
+    """
+    def __init__(self, basis: list[Shell], charges: list[float], coords: list[float], spherical: bool = False, threshold: float = 1e-14) -> None:
+        super().__init__(basis, spherical, threshold)
+        self.charges = numpy.asarray(charges, dtype = float)
+        self.coords  = numpy.asarray(coords, dtype = float).reshape(-1, 3)
+
+    def pair(self, pair: ShellPair) -> float:
+        _a, _b  = tuple(pair.first.shell), tuple(pair.second.shell)
+        _total  = sum(_a) + sum(_b)
+        _p      = pair.exponents[:, None]
+        _PA     = (pair.centers - pair.first.center)[:, None, :]
+        _PC     = pair.centers[:, None, :] - self.coords[None, :, :]
+        _boys   = maths.boys(_total, _p * numpy.sum(_PC**2, axis = -1)) * (2 * numpy.pi / _p * pair.coefficients[:, None] * -self.charges)
+        _vrr_cache = {}
+        _hrr_cache = {}
+
+        def _vrr(a: tuple, m: int) -> list[float]:
+            _key = (a, m)
+            if _key in _vrr_cache:
+                return _vrr_cache[_key]
+            if sum(a) == 0:
+                _value = _boys[m]
+            else:
+                _i  = next(_x for _x in range(3) if a[_x] > 0)
+                _a1 = tuple(_v - 1 if _x == _i else _v for _x, _v in enumerate(a))
+                _value = _PA[..., _i] * _vrr(_a1, m) - _PC[..., _i] * _vrr(_a1, m + 1)
+                if _a1[_i] > 0:
+                    _a2 = tuple(_v - 1 if _x == _i else _v for _x, _v in enumerate(_a1))
+                    _value = _value + _a1[_i] / (2 * _p) * (_vrr(_a2, m) - _vrr(_a2, m + 1))
+            _vrr_cache[_key] = _value
+            return _value
+
+        def _hrr(a: tuple, b: tuple) -> float:
+            _key = (a, b)
+            if _key in _hrr_cache:
+                return _hrr_cache[_key]
+            if sum(b) == 0:
+                _value = numpy.sum(_vrr(a, 0))
+            else:
+                _i  = next(_x for _x in range(3) if b[_x] > 0)
+                _b1 = tuple(_v - 1 if _x == _i else _v for _x, _v in enumerate(b))
+                _a1 = tuple(_v + 1 if _x == _i else _v for _x, _v in enumerate(a))
+                _value = _hrr(_a1, _b1) + pair.distance[_i] * _hrr(a, _b1)
+            _hrr_cache[_key] = _value
+            return _value
+
+        return float(_hrr(_a, _b))
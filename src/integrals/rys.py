@@ -0,0 +1,182 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+import numpy
+import typing
+
+# Parameters of the interpolation tables for the Rys roots and weights
+RYS_MAX_ROOTS       = 13
+RYS_GRID_SPACING    = 1.0
+RYS_GRID_OFFSET     = 30.0
+RYS_GRID_SLOPE      = 10.0
+RYS_CHEBYSHEV_TERMS = 16
+RYS_QUADRATURE_SIZE = 400
+
+def _rys_cutoff(nroots: int) -> float:
+    """
+    Returns the argument beyond which the Gauss-Hermite limit is used instead of the tables.
+
+    The higher moments probe larger t, so the truncated tail of exp(-X t^2) beyond t = 1 only becomes
+    negligible at larger X as the number of roots grows.
+
+    Args:
+    -----
+        nroots (int): The number of quadrature points.
+
+    Returns:
+    --------
+        float: The cutoff, a multiple of RYS_GRID_SPACING.
+    """
+    return RYS_GRID_OFFSET + RYS_GRID_SLOPE * nroots
+
+def _rys_exact(nroots: int, argument: list[float]) -> tuple[list[float], list[float]]:
+    """
+    Computes the Rys roots and weights directly for a set of arguments.
+
+    The Rys weight function exp(-X t^2) on t in [0, 1] is discretized with a Gauss-Legendre rule,
+    the three-term recurrence of the polynomials orthogonal in u = t^2 is obtained with the Stieltjes
+    procedure, and the roots and weights follow from the eigen-decomposition of the Jacobi matrix
+    (Golub-Welsch). The work is vectorized over all arguments at once.
+
+    Args:
+    -----
+        nroots (int): The number of quadrature points.
+        argument (list[float]): The values of X = rho |P - Q|^2.
+
+    Returns:
+    --------
+        tuple: The roots u = t^2 and the weights, each with shape (len(argument), nroots).
+    """
+    _argument        = numpy.asarray(argument, dtype = float)[:, None]
+    _nodes, _weights = numpy.polynomial.legendre.leggauss(RYS_QUADRATURE_SIZE)
+
+    # Map the Gauss-Legendre rule from [-1, 1] to [0, 1] and build the discrete measure in u = t^2
+    _nodes   = 0.5 * (_nodes + 1.0)
+    _weights = 0.5 * _weights * numpy.exp(-_argument * _nodes**2)
+    _nodes   = numpy.broadcast_to(_nodes**2, _weights.shape)
+
+    # Stieltjes procedure for the recurrence coefficients alpha_k and beta_k
+    _alpha  = numpy.zeros((_argument.size, nroots))
+    _beta   = numpy.zeros((_argument.size, nroots))
+    _p_prev = numpy.zeros_like(_weights)
+    _p_curr = numpy.ones_like(_weights)
+    _n_prev = numpy.ones(_argument.size)
+    for _k in range(nroots):
+        _norm         = numpy.sum(_weights * _p_curr**2, axis = 1)
+        _alpha[:, _k] = numpy.sum(_weights * _nodes * _p_curr**2, axis = 1) / _norm
+        _beta[:, _k]  = _norm / _n_prev if _k > 0 else _norm
+        _p_next       = (_nodes - _alpha[:, _k, None]) * _p_curr - (_beta[:, _k, None] if _k > 0 else 0.0) * _p_prev
+        _p_prev, _p_curr, _n_prev = _p_curr, _p_next, _norm
+
+    # Golub-Welsch, the roots are the eigenvalues of the Jacobi matrix
+    _jacobi = numpy.zeros((_argument.size, nroots, nroots))
+    _diag   = numpy.arange(nroots)
+    _jacobi[:, _diag, _diag] = _alpha
+    _jacobi[:, _diag[1:], _diag[:-1]] = numpy.sqrt(_beta[:, 1:])
+    _jacobi[:, _diag[:-1], _diag[1:]] = numpy.sqrt(_beta[:, 1:])
+    _roots, _vectors = numpy.linalg.eigh(_jacobi)
+    return _roots, _beta[:, :1] * _vectors[:, 0, :]**2
+
+def _rys_asymptotic(nroots: int, argument: list[float]) -> tuple[list[float], list[float]]:
+    """
+    Computes the Rys roots and weights for large arguments from the Gauss-Hermite rule.
+
+    For large X the weight function exp(-X t^2) has decayed long before t = 1, so the integral can be
+    extended to infinity and the positive half of a 2n-point Gauss-Hermite rule becomes exact.
+
+    Args:
+    -----
+        nroots (int): The number of quadrature points.
+        argument (list[float]): The values of X = rho |P - Q|^2.
+
+    Returns:
+    --------
+        tuple: The roots u = t^2 and the weights, each with shape (len(argument), nroots).
+    """
+    _argument        = numpy.asarray(argument, dtype = float)[:, None]
+    _nodes, _weights = numpy.polynomial.hermite.hermgauss(2 * nroots)
+    return _nodes[nroots:]**2 / _argument, _weights[nroots:] / numpy.sqrt(_argument)
+
+@functools.lru_cache(maxsize = None)
+def _rys_table(nroots: int) -> tuple[list[float], list[float]]:
+    """
+    Builds the piecewise Chebyshev interpolation table of the Rys roots and weights.
+
+    The interval [0, _rys_cutoff(nroots)) is split into panels of width RYS_GRID_SPACING, and on each panel the
+    roots and weights are fitted by Chebyshev polynomials through the Chebyshev nodes of that panel. The table
+    is built once per number of roots on first use.
+
+    Args:
+    -----
+        nroots (int): The number of quadrature points.
+
+    Returns:
+    --------
+        tuple: Chebyshev coefficients for the roots and the weights, each with shape (npanels, nterms, nroots).
+    """
+    _npanels = int(round(_rys_cutoff(nroots) / RYS_GRID_SPACING))
+    _cheb    = numpy.cos(numpy.pi * (numpy.arange(RYS_CHEBYSHEV_TERMS) + 0.5) / RYS_CHEBYSHEV_TERMS)
+    _points  = (numpy.arange(_npanels)[:, None] + 0.5 * (_cheb[None, :] + 1.0)) * RYS_GRID_SPACING
+    _roots, _weights = _rys_exact(nroots, _points.ravel())
+
+    # Discrete Chebyshev transform on every panel
+    _vander  = numpy.polynomial.chebyshev.chebvander(_cheb, RYS_CHEBYSHEV_TERMS - 1)
+    _inverse = numpy.linalg.inv(_vander)
+    _roots   = numpy.einsum("kj,pjr->pkr", _inverse, _roots.reshape(_npanels, RYS_CHEBYSHEV_TERMS, nroots))
+    _weights = numpy.einsum("kj,pjr->pkr", _inverse, _weights.reshape(_npanels, RYS_CHEBYSHEV_TERMS, nroots))
+    return _roots, _weights
+
+def rys_roots(nroots: int, argument: typing.Union[float, list[float]]) -> tuple[list[float], list[float]]:
+    """
+    Returns the roots and weights of the Rys quadrature for the given arguments.
+
+    The roots u_i = t_i^2 and the weights w_i satisfy sum_i w_i u_i^k = F_k(X) for k < 2 * nroots, so
+    that sum_i w_i equals the Boys function F_0(X). Arguments below the cutoff are interpolated
+    from the precomputed Chebyshev tables, larger arguments use the Gauss-Hermite limit.
+
+    Args:
+    -----
+        nroots (int): The number of quadrature points.
+        argument (Union[float, list[float]]): The values of X = rho |P - Q|^2.
+
+    Returns:
+    --------
+        tuple: The roots and the weights, each with shape (*argument.shape, nroots).
+    """
+    if nroots > RYS_MAX_ROOTS:
+        raise ValueError(f"The Rys quadrature is only tabulated up to {RYS_MAX_ROOTS} roots, but {nroots} were requested.")
+
+    _argument = numpy.asarray(argument, dtype = float)
+    _flat     = _argument.ravel()
+    _roots    = numpy.empty((_flat.size, nroots))
+    _weights  = numpy.empty((_flat.size, nroots))
+    _small    = _flat < _rys_cutoff(nroots)
+
+    # Clenshaw evaluation of the Chebyshev series on the panel containing each argument
+    _coeffs_r, _coeffs_w = _rys_table(nroots)
+    _panel  = numpy.minimum((_flat[_small] / RYS_GRID_SPACING).astype(int), _coeffs_r.shape[0] - 1)
+    _local  = 2.0 * (_flat[_small] / RYS_GRID_SPACING - _panel) - 1.0
+    _b1_r   = _b2_r = _b1_w = _b2_w = 0.0
+    for _k in range(RYS_CHEBYSHEV_TERMS - 1, 0, -1):
+        _b1_r, _b2_r = _coeffs_r[_panel, _k] + 2.0 * _local[:, None] * _b1_r - _b2_r, _b1_r
+        _b1_w, _b2_w = _coeffs_w[_panel, _k] + 2.0 * _local[:, None] * _b1_w - _b2_w, _b1_w
+    _roots[_small]   = _coeffs_r[_panel, 0] + _local[:, None] * _b1_r - _b2_r
+    _weights[_small] = _coeffs_w[_panel, 0] + _local[:, None] * _b1_w - _b2_w
+
+    # Gauss-Hermite limit for the remaining arguments
+    if not numpy.all(_small):
+        _roots[~_small], _weights[~_small] = _rys_asymptotic(nroots, _flat[~_small])
+    return _roots.reshape(_argument.shape + (nroots,)), _weights.reshape(_argument.shape + (nroots,))
@@ -0,0 +1,225 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from planck.src.integrals.twoelectron import TwoElectronIntegral, _cost_obara_saika, _cost_rys
+import numpy
+import tempfile
+import typing
+
+# Size of one stored integral in bytes
+INTEGRAL_BYTES = numpy.dtype(numpy.float64).itemsize
+
+# Bytes per megabyte, the unit of the memory and disk budgets
+MEGABYTE = 1024.0 * 1024.0
+
+class StoragePlan:
+    """
+    Decides where the unique block quartets of a two-electron integral driver are kept.
+
+    The packed size of the integrals is the sum over the unique block quartets (IJ >= KL) that survive
+    Schwarz screening. If everything fits in memory, all quartets are stored in-core. Otherwise the
+    quartets are ranked by their estimated evaluation cost per byte, and the most expensive ones are stored
+    in memory and then on disk (semi-direct), while the rest is recomputed in every Fock build. A quartet is
+    only put on disk if reading it is estimated to be cheaper than recomputing it. If nothing can be
+    stored, all integrals are computed on the fly (direct).
+
+    The costs are those of the engine cost model, in units of one floating point operation. Quartets with
+    a Schwarz bound below `screening` are not counted, and reading one byte from disk is taken to cost
+    `disk_cost` operations. Quartets with a Schwarz bound below `mixed_threshold` are evaluated in single
+    precision while mixed precision is active, so they are never stored and always recomputed.
+
+    Attributes:
+    -----------
+        strategy (str): The chosen strategy, "in-core", "semi-direct" or "direct".
+        memory (float): The memory budget in MB.
+        disk (float): The disk budget in MB.
+        quartets (int): The number of unique block quartets after screening.
+        mixed_threshold (float): The Schwarz bound below which quartets are evaluated in single precision, zero without mixed precision.
+        single (int): The number of quartets below `mixed_threshold`, which are left out of the storage.
+        total (float): The packed size of all screened integrals in MB.
+        locations (dict[tuple[int, int, int, int], tuple[str, int]]): The storage of every stored block quartet,
+            either ("memory", 0) or ("disk", offset), the offset counting integrals.
+        shapes (dict[tuple[int, int, int, int], tuple[int, int, int, int]]): The shape of every stored block quartet.
+        memory_used (float): The memory taken by the stored quartets in MB.
+        disk_used (float): The disk space taken by the stored quartets in MB.
+        direct_cost (float): The estimated cost of evaluating all quartets once.
+        cost (float): The estimated cost per Fock build with this plan, recomputation plus disk reads.
+    """
+    def __init__(self, eri: TwoElectronIntegral, memory: float, disk: float = 0.0, screening: float = 1e-12, disk_cost: float = 2.0,
+                 mixed_threshold: float = 0.0) -> None:
+        self.memory    = memory
+        self.disk      = disk
+        self.locations = {}
+        self.shapes    = {}
+        self.mixed_threshold = mixed_threshold
+
+        _bounds     = eri.schwarz()
+        _blockpairs = [(_I, _J) for _I in range(len(eri.blocks)) for _J in range(_I + 1) if _bounds[_I, _J] > 0.0]
+        _quartets, _sizes, _costs, _single = [], [], [], []
+        _cache = {}
+        for _index, (_I, _J) in enumerate(_blockpairs):
+            for _K, _L in _blockpairs[:_index + 1]:
+                if _bounds[_I, _J] * _bounds[_K, _L] < screening:
+                    continue
+                _quartets.append((_I, _J, _K, _L))
+                _sizes.append(int(numpy.prod([eri.matrices[_X].shape[0] for _X in (_I, _J, _K, _L)])) * INTEGRAL_BYTES)
+                _costs.append(block_cost(eri, _I, _J, _K, _L, _cache))
+                _single.append(_bounds[_I, _J] * _bounds[_K, _L] < mixed_threshold)
+
+        _sizes, _costs   = numpy.array(_sizes, dtype = float), numpy.array(_costs, dtype = float)
+        self.quartets    = len(_quartets)
+        self.single      = int(numpy.sum(_single))
+        self.total       = float(numpy.sum(_sizes)) / MEGABYTE
+        self.direct_cost = float(numpy.sum(_costs))
+
+        # Greedy filling by cost per byte, first the memory and then the disk
+        _memory, _disk = memory * MEGABYTE, disk * MEGABYTE
+        _stored = numpy.zeros(len(_quartets), dtype = bool)
+        _ondisk = numpy.zeros(len(_quartets), dtype = bool)
+        _offset = 0
+        for _q in numpy.argsort(-_costs / numpy.maximum(_sizes, 1.0), kind = "stable"):
+            _shape = tuple(eri.matrices[_X].shape[0] for _X in _quartets[_q])
+            if _single[_q]:
+                continue
+            if _sizes[_q] <= _memory:
+                _memory -= _sizes[_q]
+                self.locations[_quartets[_q]] = ("memory", 0)
+            elif _sizes[_q] <= _disk and _costs[_q] > disk_cost * _sizes[_q]:
+                _disk -= _sizes[_q]
+                self.locations[_quartets[_q]] = ("disk", _offset)
+                _offset += int(_sizes[_q]) // INTEGRAL_BYTES
+                _ondisk[_q] = True
+            else:
+                continue
+            self.shapes[_quartets[_q]] = _shape
+            _stored[_q] = True
+
+        self.memory_used = float(numpy.sum(_sizes[_stored & ~_ondisk])) / MEGABYTE
+        self.disk_used   = float(numpy.sum(_sizes[_ondisk])) / MEGABYTE
+        self.cost        = float(numpy.sum(_costs[~_stored]) + disk_cost * numpy.sum(_sizes[_ondisk]))
+        if _stored.all() and not _ondisk.any():
+            self.strategy = "in-core"
+        elif _stored.any():
+            self.strategy = "semi-direct"
+        else:
+            self.strategy = "direct"
+
+    def report(self) -> str:
+        """
+        Returns a human readable summary of the plan and its cost estimate.
+        """
+        _stored = len(self.locations)
+        _ondisk = sum(1 for _where, _ in self.locations.values() if _where == "disk")
+        _lines  = [f"Integral storage strategy : {self.strategy}",
+                   f"Unique block quartets     : {self.quartets} after screening",
+                   f"Packed ERI size           : {self.total:.4g} MB",
+                   f"Memory used / budget      : {self.memory_used:.4g} / {self.memory:.4g} MB ({_stored - _ondisk} quartets)",
+                   f"Disk used / budget        : {self.disk_used:.4g} / {self.disk:.4g} MB ({_ondisk} quartets)",
+                   f"Recomputed quartets       : {self.quartets - _stored}",
+                   f"Mixed precision           : {self._mixed()}",
+                   f"Cost per Fock build       : {self.cost:.3e} (direct {self.direct_cost:.3e}) operations"]
+        return "\n".join(_lines)
+
+    def _mixed(self) -> str:
+        """
+        Describes how mixed precision interacts with the plan, for `report`.
+        """
+        if self.mixed_threshold <= 0.0:
+            return "off"
+        if self.single == 0:
+            return f"off, no quartet has a Schwarz bound below {self.mixed_threshold:.1e}"
+        return f"{self.single} quartets below {self.mixed_threshold:.1e} in single precision, recomputed"
+
+class IntegralStorage:
+    """
+    Holds the block quartets selected by a `StoragePlan`.
+
+    The quartets are stored the first time they are evaluated. In-core quartets are kept in a dictionary,
+    the others in an anonymous temporary file that is mapped into memory and removed when the storage is
+    discarded.
+
+    Attributes:
+    -----------
+        plan (StoragePlan): The storage plan.
+        memory (dict[tuple[int, int, int, int], numpy.ndarray]): The quartets stored in memory.
+        disk (Optional[numpy.memmap]): The mapped file holding the quartets stored on disk.
+        filled (set[tuple[int, int, int, int]]): The quartets already written to disk.
+    """
+    def __init__(self, plan: StoragePlan, directory: typing.Optional[str] = None) -> None:
+        self.plan   = plan
+        self.memory = {}
+        self.filled = set()
+        self.disk   = None
+        _size = sum(int(numpy.prod(plan.shapes[_key])) for _key, (_where, _) in plan.locations.items() if _where == "disk")
+        if _size > 0:
+            self._file = tempfile.TemporaryFile(dir = directory)
+            self.disk  = numpy.memmap(self._file, dtype = numpy.float64, mode = "w+", shape = (_size,))
+
+    def __contains__(self, key: tuple[int, int, int, int]) -> bool:
+        return key in self.plan.locations
+
+    def get(self, key: tuple[int, int, int, int]) -> typing.Optional[list[list[list[list[float]]]]]:
+        """
+        Returns a stored block quartet, or None if it is not stored (yet).
+        """
+        _where, _offset = self.plan.locations.get(key, (None, 0))
+        if _where == "memory":
+            return self.memory.get(key)
+        if _where == "disk" and key in self.filled:
+            _shape = self.plan.shapes[key]
+            return numpy.array(self.disk[_offset:_offset + int(numpy.prod(_shape))]).reshape(_shape)
+        return None
+
+    def put(self, key: tuple[int, int, int, int], values: list[list[list[list[float]]]]) -> None:
+        """
+        Stores a block quartet if the plan selected it.
+        """
+        _where, _offset = self.plan.locations.get(key, (None, 0))
+        if _where == "memory":
+            self.memory[key] = numpy.array(values, dtype = numpy.float64)
+        elif _where == "disk":
+            self.disk[_offset:_offset + values.size] = numpy.ravel(values)
+            self.filled.add(key)
+
+def block_cost(eri: TwoElectronIntegral, I: int, J: int, K: int, L: int, cache: typing.Optional[dict] = None) -> float:
+    """
+    Estimates the cost of evaluating a block quartet with the cheaper of the two engine cost models.
+
+    The cost of one function quartet is estimated from the first function of every block and multiplied
+    by the number of unique function quartets in the block quartet.
+
+    Args:
+    -----
+        eri (TwoElectronIntegral): The integral driver.
+        I, J, K, L (int): The indices of the shell blocks.
+        cache (Optional[dict]): A cache of the per-quartet costs, keyed by the Cartesian exponents and the number of primitives.
+
+    Returns:
+    --------
+        float: The estimated cost in floating point operations.
+    """
+    _shells = [eri.basis[eri.blocks[_X][0]] for _X in (I, J, K, L)]
+    _key    = tuple(tuple(_shell.shell) for _shell in _shells) + (int(numpy.prod([_shell.exponents.size for _shell in _shells])),)
+    _cache  = {} if cache is None else cache
+    if _key not in _cache:
+        _cache[_key] = min(_cost_obara_saika(*_key), _cost_rys(*_key))
+
+    _sizes = [len(eri.blocks[_X]) for _X in (I, J, K, L)]
+    _count = _sizes[0] * _sizes[1] * _sizes[2] * _sizes[3]
+    if I == J:
+        _count = _count * (_sizes[0] + 1) // (2 * _sizes[0])
+    if K == L:
+        _count = _count * (_sizes[2] + 1) // (2 * _sizes[2])
+    return _cache[_key] * _count
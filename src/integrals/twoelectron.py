@@ -0,0 +1,907 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from abc import abstractmethod
+from planck.src.basis.base import Shell
+from planck.src.basis.spherical import block_matrices, shell_blocks
+from planck.src.helpers import maths
+from planck.src.integrals.base import Integral, ShellPair, significant_pairs
+from planck.src.integrals.rys import rys_roots
+import importlib
+import math
+import numpy
+import time
+import typing
+
+# Relative costs used by the engine cost model, in units of one floating point operation
+VECTOR_OVERHEAD = 400.0
+BOYS_COST       = 12.0
+ROOTS_COST      = 40.0
+
+# Largest number of intermediate array elements per bra function in a batched evaluation, see `TwoElectronIntegral.batch`
+BATCH_ELEMENTS = 1 << 21
+
+# Optional engines built on top of the integral driver, keyed by name, as (module in planck.src.integrals, class)
+ENGINES = {"multipole": ("multipole", "MultipoleCoulomb"), "cholesky": ("cholesky", "CholeskyERI")}
+
+# Axis orders of the eight permutations (ij|kl), (ji|kl), (ij|lk), (ji|lk), (kl|ij), (lk|ij), (kl|ji), (lk|ji)
+_PERMUTATIONS = [(0, 1, 2, 3), (1, 0, 2, 3), (0, 1, 3, 2), (1, 0, 3, 2), (2, 3, 0, 1), (3, 2, 0, 1), (2, 3, 1, 0), (3, 2, 1, 0)]
+
+class TwoElectronIntegral(Integral):
+    """
+    Common driver for the electron repulsion integral (ERI) engines.
+
+    The driver builds the significant shell pairs (i >= j) of the basis, loops over the unique quartets of
+    shell blocks and evaluates every Cartesian block with `quartet`, which subclasses implement for a
+    single contracted integral (ij|kl). Blocks of the same angular momentum class are then transformed
+    to spherical functions as one batch, right after evaluation, and scattered over their eight
+    permutations.
+
+    Attributes:
+    -----------
+        basis (list[Shell]): The basis functions, indexed by their position in the list.
+        spherical (bool): Whether the integrals are returned over spherical (pure) functions.
+        threshold (float): The overlap threshold below which shell pairs are neglected, see `significant_pairs`.
+        blocks (list[list[int]]): The basis indices of every shell block.
+        matrices (list[numpy.ndarray]): The Cartesian to spherical transformation of every block.
+        nbasis (int): The number of basis functions after the transformation.
+        shellpairs (list[ShellPair]): The unique shell pairs, created by `create_shellpairs`.
+        pairs (dict[tuple[int, int], ShellPair]): The same shell pairs, keyed by their basis indices.
+        bounds (numpy.ndarray): The Schwarz bounds of the block pairs, computed by `schwarz`.
+        precision_error (float): The estimated error of the last `jk` build due to single precision.
+        storage (Optional[IntegralStorage]): Where block quartets are kept between builds, see `StoragePlan`.
+            If None, all integrals are computed directly.
+    """
+    def __init__(self, basis: list[Shell], spherical: bool = False, threshold: float = 1e-14) -> None:
+        self.basis      = basis
+        self.spherical  = spherical
+        self.threshold  = threshold
+        self.blocks     = shell_blocks(basis)
+        self.matrices   = block_matrices(basis, self.blocks, spherical)
+        self.nbasis     = sum(_matrix.shape[0] for _matrix in self.matrices)
+        self.shellpairs = []
+        self.pairs      = {}
+        self.bounds     = None
+        self.precision_error = 0.0
+        self.storage    = None
+        for _index, _shell in enumerate(self.basis):
+            _shell.basisindex = _index
+
+    def create_shellpairs(self) -> None:
+        """
+        Creates the significant shell pairs (i >= j) of the basis, neglecting pairs whose overlap is below the threshold.
+        """
+        self.shellpairs = [ShellPair(self.basis[_i], self.basis[_j]) for _i, _j in significant_pairs(self.basis, self.threshold)]
+        self.pairs      = {_pair.indices: _pair for _pair in self.shellpairs}
+
+    def sort_shellpairs(self) -> None:
+        """
+        Sorts the shell pairs by angular momentum class, so that quartets of the same class are evaluated together.
+        """
+        self.shellpairs.sort(key = lambda pair: (sum(pair.momentum), pair.momentum))
+
+    @abstractmethod
+    def quartet(self, bra: ShellPair, ket: ShellPair, dtype: type = numpy.float64) -> float:
+        """
+        Evaluates the contracted integral (ij|kl) for a bra pair (ij) and a ket pair (kl).
+
+        The recurrences run in the floating point type `dtype`, while the Boys function and the Rys
+        roots are always evaluated in double precision.
+        """
+        pass
+
+    def evaluate(self) -> list[list[list[list[float]]]]:
+        """
+        Evaluates the full ERI tensor over the basis functions.
+
+        Returns:
+        --------
+            numpy.ndarray: The integrals (ij|kl) in chemists' notation, with shape (nbasis, nbasis, nbasis, nbasis).
+        """
+        if not self.shellpairs:
+            self.create_shellpairs()
+            self.sort_shellpairs()
+
+        _offsets = numpy.cumsum([0] + [_matrix.shape[0] for _matrix in self.matrices])
+        _eri     = numpy.zeros((self.nbasis, self.nbasis, self.nbasis, self.nbasis))
+
+        # Block pairs that contain at least one significant shell pair
+        _owner       = {_i: _X for _X, _block in enumerate(self.blocks) for _i in _block}
+        _blockpairs  = sorted({(_owner[_i], _owner[_j]) for _i, _j in self.pairs})
+
+        # Evaluate the Cartesian blocks of every unique block quartet, batched by angular momentum class
+        _batches = {}
+        for _index, (_I, _J) in enumerate(_blockpairs):
+            for _K, _L in _blockpairs[:_index + 1]:
+                _class = tuple(self.matrices[_X].shape for _X in (_I, _J, _K, _L))
+                _batches.setdefault(_class, ([], []))
+                _batches[_class][0].append((_I, _J, _K, _L))
+                _batches[_class][1].append(self.cartesian_block(_I, _J, _K, _L))
+
+        for _quartets, _values in _batches.values():
+            # Batched Cartesian to spherical transformation, one matrix multiply per index
+            _I, _J, _K, _L = _quartets[0]
+            _values = numpy.einsum("ai,qijkl->qajkl", self.matrices[_I], numpy.array(_values))
+            _values = numpy.einsum("bj,qajkl->qabkl", self.matrices[_J], _values)
+            _values = numpy.einsum("ck,qabkl->qabcl", self.matrices[_K], _values)
+            _values = numpy.einsum("dl,qabcl->qabcd", self.matrices[_L], _values)
+
+            for (_I, _J, _K, _L), _value in zip(_quartets, _values):
+                _i, _j, _k, _l = (numpy.arange(_offsets[_X], _offsets[_X + 1]) for _X in (_I, _J, _K, _L))
+                _eri[numpy.ix_(_i, _j, _k, _l)] = _value
+                _eri[numpy.ix_(_j, _i, _k, _l)] = _value.transpose(1, 0, 2, 3)
+                _eri[numpy.ix_(_i, _j, _l, _k)] = _value.transpose(0, 1, 3, 2)
+                _eri[numpy.ix_(_j, _i, _l, _k)] = _value.transpose(1, 0, 3, 2)
+                _eri[numpy.ix_(_k, _l, _i, _j)] = _value.transpose(2, 3, 0, 1)
+                _eri[numpy.ix_(_l, _k, _i, _j)] = _value.transpose(3, 2, 0, 1)
+                _eri[numpy.ix_(_k, _l, _j, _i)] = _value.transpose(2, 3, 1, 0)
+                _eri[numpy.ix_(_l, _k, _j, _i)] = _value.transpose(3, 2, 1, 0)
+        return _eri
+
+    def cartesian_block(self, I: int, J: int, K: int, L: int, dtype: type = numpy.float64) -> list[list[list[list[float]]]]:
+        """
+        Evaluates the integrals over the Cartesian functions of four shell blocks.
+
+        Args:
+        -----
+            I, J, K, L (int): The indices of the shell blocks.
+            dtype (type): The floating point type in which the integrals are evaluated.
+
+        Returns:
+        --------
+            numpy.ndarray: The integrals with shape (nI, nJ, nK, nL).
+        """
+        _block = numpy.empty(tuple(len(self.blocks[_X]) for _X in (I, J, K, L)))
+        _cache = {}
+        for _a, _i in enumerate(self.blocks[I]):
+            for _b, _j in enumerate(self.blocks[J]):
+                for _c, _k in enumerate(self.blocks[K]):
+                    for _d, _l in enumerate(self.blocks[L]):
+                        # Use the permutational symmetry within the block quartet
+                        _bra = (max(_i, _j), min(_i, _j))
+                        _ket = (max(_k, _l), min(_k, _l))
+                        _key = max(_bra, _ket), min(_bra, _ket)
+                        if _key not in _cache:
+                            _significant = _key[0] in self.pairs and _key[1] in self.pairs
+                            _cache[_key] = self.quartet(self.pairs[_key[0]], self.pairs[_key[1]], dtype) if _significant else 0.0
+                        _block[_a, _b, _c, _d] = _cache[_key]
+        return _block
+
+    def block(self, I: int, J: int, K: int, L: int, dtype: type = numpy.float64) -> list[list[list[list[float]]]]:
+        """
+        Evaluates the integrals of four shell blocks, transformed to spherical functions if requested.
+
+        Args:
+        -----
+            I, J, K, L (int): The indices of the shell blocks.
+            dtype (type): The floating point type in which the integrals are evaluated.
+
+        Returns:
+        --------
+            numpy.ndarray: The integrals with shape (nI, nJ, nK, nL).
+        """
+        _values = self.cartesian_block(I, J, K, L, dtype)
+        if self.spherical:
+            _values = numpy.einsum("ai,bj,ck,dl,ijkl->abcd", self.matrices[I], self.matrices[J], self.matrices[K], self.matrices[L], _values, optimize = True)
+        return _values
+
+    def fetch(self, I: int, J: int, K: int, L: int, dtype: type = numpy.float64) -> list[list[list[list[float]]]]:
+        """
+        Returns the integrals of four shell blocks, from the integral storage if they are kept there.
+
+        Quartets selected for storage are always evaluated in double precision and stored on first use.
+
+        Args:
+        -----
+            I, J, K, L (int): The indices of the shell blocks, with (I, J) >= (K, L) as in `jk`.
+            dtype (type): The floating point type in which quartets that are not stored are evaluated.
+
+        Returns:
+        --------
+            numpy.ndarray: The integrals with shape (nI, nJ, nK, nL).
+        """
+        _key = (I, J, K, L)
+        if self.storage is None or _key not in self.storage:
+            return self.block(I, J, K, L, dtype)
+
+        _values = self.storage.get(_key)
+        if _values is None:
+            _values = self.block(I, J, K, L)
+            self.storage.put(_key, _values)
+        return _values
+
+    def batch(self, quartets: list[tuple[int, int, int, int]], dtype: type = numpy.float64) -> list[list[list[list[list[float]]]]]:
+        """
+        Evaluates block quartets of one class at once with Rys quadrature, transformed to spherical functions if requested.
+
+        Batching whole block quartets is what lets reduced precision pay off: the kernel runs on arrays that span all
+        function quartets, primitives and roots of the batch, rather than on one small contracted integral at a time.
+
+        Args:
+        -----
+            quartets (list[tuple[int, int, int, int]]): The block quartets, which must agree in the angular momenta, the
+                number of functions and the number of primitives of their four blocks.
+            dtype (type): The floating point type in which the integrals are evaluated.
+
+        Returns:
+        --------
+            numpy.ndarray: The integrals with shape (nquartets, nI, nJ, nK, nL) and type `dtype`.
+        """
+        _values = _rys_blocks(self, quartets, dtype)
+        if self.spherical:
+            _matrices = [self.matrices[_X].astype(dtype, copy = False) for _X in quartets[0]]
+            _values   = numpy.einsum("ai,bj,ck,dl,qijkl->qabcd", *_matrices, _values, optimize = True)
+        return _values
+
+    def batch_size(self, quartet: tuple[int, int, int, int]) -> int:
+        """
+        Returns the number of intermediate array elements `batch` needs per block quartet of the class of `quartet`.
+        """
+        _first  = [self.basis[self.blocks[_X][0]] for _X in quartet]
+        _nroots = sum(_shell.type.value for _shell in _first) // 2 + 1
+        _nprims = math.prod(_shell.exponents.size for _shell in _first)
+        return math.prod(len(self.blocks[_X]) for _X in quartet[1:]) * _nprims * _nroots
+
+    def schwarz(self) -> list[list[float]]:
+        """
+        Computes the Schwarz bounds Q_IJ = max_(ij) sqrt(|(ij|ij)|) of every pair of shell blocks.
+
+        The bounds satisfy |(ij|kl)| <= Q_IJ Q_KL for all functions of the four blocks. They are computed
+        once and cached.
+
+        Returns:
+        --------
+            numpy.ndarray: The bounds with shape (nblocks, nblocks), zero for neglected block pairs.
+        """
+        if self.bounds is not None:
+            return self.bounds
+        if not self.shellpairs:
+            self.create_shellpairs()
+            self.sort_shellpairs()
+
+        _owner      = {_i: _X for _X, _block in enumerate(self.blocks) for _i in _block}
+        self.bounds = numpy.zeros((len(self.blocks), len(self.blocks)))
+        for _I, _J in {(_owner[_i], _owner[_j]) for _i, _j in self.pairs}:
+            _diagonal = numpy.einsum("ijij->ij", self.block(_I, _J, _I, _J))
+            self.bounds[_I, _J] = self.bounds[_J, _I] = numpy.sqrt(numpy.max(numpy.abs(_diagonal)))
+        return self.bounds
+
+    def jk(self, density: list[list[float]], mixed_threshold: float = 0.0, screening: float = 1e-12,
+           nearfield: typing.Optional[dict[tuple[int, int], tuple[bool, bool]]] = None) -> tuple[list[list[float]], list[list[float]]]:
+        """
+        Builds the Coulomb and exchange matrices directly from the integrals, without storing them.
+
+        J_ij = sum_kl (ij|kl) D_kl and K_ij = sum_kl (ik|jl) D_kl are accumulated in double precision over the
+        unique block quartets. Quartets whose Schwarz bound, multiplied by the largest density element they
+        touch, is below `screening` are skipped. Quartets whose Schwarz bound is below `mixed_threshold` are
+        evaluated in single precision, grouped by class and batched (see `batch`), and the error they introduce in the Fock matrix F = J - K/2 is
+        estimated element-wise from the single precision round-off and stored in `precision_error`.
+
+        When the far field of the Coulomb matrix is built from multipole expansions (see `MultipoleCoulomb`),
+        only the near-field quartets contribute to J, while the exchange is still accumulated over all quartets,
+        so every quartet is evaluated once for both matrices.
+
+        Args:
+        -----
+            density (numpy.ndarray): The density matrix D.
+            mixed_threshold (float): The Schwarz bound below which quartets are evaluated in single precision.
+                A value of zero evaluates everything in double precision.
+            screening (float): The threshold below which quartets are neglected.
+            nearfield (Optional[dict]): The near-field quartets, keyed by the indices (b, k), b >= k, of their bra and
+                ket block pairs, with flags telling whether they contribute to the Coulomb matrix of the bra and of
+                the ket. If given, all other quartets only contribute to the exchange matrix.
+
+        Returns:
+        --------
+            tuple: The Coulomb matrix J and the exchange matrix K.
+        """
+        _bounds  = self.schwarz()
+        _offsets = numpy.cumsum([0] + [_matrix.shape[0] for _matrix in self.matrices])
+        _slices  = [slice(_offsets[_X], _offsets[_X + 1]) for _X in range(len(self.blocks))]
+        _density = numpy.asarray(density, dtype = numpy.float64)
+
+        # Largest and summed absolute density per block pair, for screening and for the error estimate
+        _dmax = numpy.array([[numpy.max(numpy.abs(_density[_A, _B]), initial = 0.0) for _B in _slices] for _A in _slices])
+        _dsum = numpy.array([[numpy.sum(numpy.abs(_density[_A, _B])) for _B in _slices] for _A in _slices])
+
+        _coulomb  = numpy.zeros_like(_density)
+        _exchange = numpy.zeros_like(_density)
+        _error_j  = numpy.zeros_like(_dmax)
+        _error_k  = numpy.zeros_like(_dmax)
+        _epsilon  = float(numpy.finfo(numpy.float32).eps)
+
+        def _accumulate(quartet: tuple[int, int, int, int], values: list[list[list[list[float]]]], target: tuple[bool, bool]) -> None:
+            # Every distinct permutation of the block quartet covers a different part of the full tensor
+            _seen = set()
+            for _order in _PERMUTATIONS:
+                _A, _B, _C, _D = quartet[_order[0]], quartet[_order[1]], quartet[_order[2]], quartet[_order[3]]
+                if (_A, _B, _C, _D) in _seen:
+                    continue
+                _seen.add((_A, _B, _C, _D))
+                _permuted = values.transpose(_order)
+                _exchange[_slices[_A], _slices[_C]] += numpy.einsum("ijkl,jl->ik", _permuted, _density[_slices[_B], _slices[_D]])
+
+                # The permutations starting with the ket block pair build the Coulomb matrix of the ket
+                if target[_order[0] // 2]:
+                    _coulomb[_slices[_A], _slices[_B]] += numpy.einsum("ijkl,kl->ij", _permuted, _density[_slices[_C], _slices[_D]])
+
+        def _accumulate_batch(quartets: list[list[int]], values: list[list[list[list[list[float]]]]], targets: list[list[bool]]) -> None:
+            # The same permutations for single precision block quartets of one class, scattered with index arrays
+            _bound    = _bounds[quartets[:, 0], quartets[:, 1]] * _bounds[quartets[:, 2], quartets[:, 3]]
+            _ranges   = [numpy.arange(_size) for _size in values.shape[1:]]
+            _previous = []
+            for _order in _PERMUTATIONS:
+                _permuted = quartets[:, _order]
+                _distinct = numpy.ones(len(quartets), dtype = bool)
+                for _other in _previous:
+                    _distinct &= numpy.any(_permuted != _other, axis = 1)
+                _previous.append(_permuted)
+
+                _A, _B, _C, _D = _permuted.T
+                _rA, _rB, _rC, _rD = (_offsets[_X][:, None] + _ranges[_axis] for _X, _axis in zip(_permuted.T, _order))
+                _block = values.transpose((0,) + tuple(_axis + 1 for _axis in _order))
+                _exchange_part = numpy.einsum("qijkl,qjl->qik", _block, _density[_rB[:, :, None], _rD[:, None, :]])
+                numpy.add.at(_exchange, (_rA[_distinct, :, None], _rC[_distinct, None, :]), _exchange_part[_distinct])
+                numpy.add.at(_error_k, (_A[_distinct], _C[_distinct]), _epsilon * _bound[_distinct] * _dsum[_B[_distinct], _D[_distinct]])
+
+                _ket = _distinct & targets[:, _order[0] // 2]
+                _coulomb_part = numpy.einsum("qijkl,qkl->qij", _block[_ket], _density[_rC[_ket, :, None], _rD[_ket, None, :]])
+                numpy.add.at(_coulomb, (_rA[_ket, :, None], _rB[_ket, None, :]), _coulomb_part)
+                numpy.add.at(_error_j, (_A[_ket], _B[_ket]), _epsilon * _bound[_ket] * _dsum[_C[_ket], _D[_ket]])
+
+        # Double precision quartets are accumulated right away, single precision ones are grouped by class for `batch`
+        _groups = {}
+        _blockpairs = [(_I, _J) for _I in range(len(self.blocks)) for _J in range(_I + 1) if _bounds[_I, _J] > 0.0]
+        for _index, (_I, _J) in enumerate(_blockpairs):
+            for _other, (_K, _L) in enumerate(_blockpairs[:_index + 1]):
+                _bound  = _bounds[_I, _J] * _bounds[_K, _L]
+                _target = (True, True) if nearfield is None else nearfield.get((_index, _other), (False, False))
+                _dmax_j = max(_dmax[_K, _L] if _target[0] else 0.0, _dmax[_I, _J] if _target[1] else 0.0)
+                if _bound * max(_dmax_j, _dmax[_I, _K], _dmax[_J, _L], _dmax[_I, _L], _dmax[_J, _K]) < screening:
+                    continue
+
+                if _bound < mixed_threshold and (self.storage is None or (_I, _J, _K, _L) not in self.storage):
+                    _class = tuple((len(self.blocks[_X]), self.basis[self.blocks[_X][0]].type, self.basis[self.blocks[_X][0]].exponents.size) for _X in (_I, _J, _K, _L))
+                    _groups.setdefault(_class, []).append((_I, _J, _K, _L) + _target)
+                else:
+                    _accumulate((_I, _J, _K, _L), self.fetch(_I, _J, _K, _L), _target)
+
+        for _class, _members in _groups.items():
+            _members = numpy.array(_members, dtype = int)
+            _size    = max(1, BATCH_ELEMENTS // self.batch_size(tuple(_members[0, :4])))
+            for _start in range(0, len(_members), _size):
+                _chunk = _members[_start:_start + _size]
+                _accumulate_batch(_chunk[:, :4], self.batch(_chunk[:, :4], numpy.float32).astype(numpy.float64), _chunk[:, 4:].astype(bool))
+
+        self.precision_error = float(numpy.max(_error_j + 0.5 * _error_k, initial = 0.0))
+        return _coulomb, _exchange
+
+    @staticmethod
+    def _primitive_quartets(bra: ShellPair, ket: ShellPair) -> dict:
+        """
+        Collects the quantities shared by every primitive quartet of a bra and a ket pair.
+
+        Returns:
+        --------
+            dict: The exponents p and q, the centers P, Q and W, the reduced exponent rho, the Boys
+                  argument T = rho |P - Q|^2 and the common prefactor, all with shape (nbra, nket).
+        """
+        _p   = bra.exponents[:, None]
+        _q   = ket.exponents[None, :]
+        _pq  = _p + _q
+        _P   = bra.centers[:, None, :]
+        _Q   = ket.centers[None, :, :]
+        _rho = _p * _q / _pq
+        return {
+            "p"         : _p,
+            "q"         : _q,
+            "P"         : _P,
+            "Q"         : _Q,
+            "W"         : (_p[..., None] * _P + _q[..., None] * _Q) / _pq[..., None],
+            "rho"       : _rho,
+            "argument"  : _rho * numpy.sum((_P - _Q)**2, axis = -1),
+            "prefactor" : 2 * pow(numpy.pi, 2.5) / (_p * _q * numpy.sqrt(_pq)) * bra.coefficients[:, None] * ket.coefficients[None, :],
+        }
+
+class ObaraSaika(TwoElectronIntegral):
+    """
+    ERI engine based on the Obara-Saika vertical recurrence and the Head-Gordon-Pople horizontal recurrence.
+
+    The vertical recurrence builds the primitive integrals [e0|f0]^(m) from the Boys function, vectorized
+    over all primitive quartets. After contraction, the horizontal recurrence transfers angular momentum
+    from the first to the second center of the bra and the ket.
+    """
+    def quartet(self, bra: ShellPair, ket: ShellPair, dtype: type = numpy.float64) -> float:
+        """
+        Evaluates the contracted integral (ij|kl) with the Obara-Saika / Head-Gordon-Pople recurrences.
+        """
+        _a, _b  = tuple(bra.first.shell), tuple(bra.second.shell)
+        _c, _d  = tuple(ket.first.shell), tuple(ket.second.shell)
+        _total  = sum(_a) + sum(_b) + sum(_c) + sum(_d)
+        _data   = self._primitive_quartets(bra, ket)
+        _boys   = (maths.boys(_total, _data["argument"]) * _data["prefactor"]).astype(dtype, copy = False)
+
+        _p, _q, _rho = (_data[_key].astype(dtype, copy = False) for _key in ("p", "q", "rho"))
+        _PA = (_data["P"] - bra.first.center).astype(dtype, copy = False)
+        _WP = (_data["W"] - _data["P"]).astype(dtype, copy = False)
+        _QC = (_data["Q"] - ket.first.center).astype(dtype, copy = False)
+        _WQ = (_data["W"] - _data["Q"]).astype(dtype, copy = False)
+        _AB = bra.distance.astype(dtype, copy = False)
+        _CD = ket.distance.astype(dtype, copy = False)
+        _vrr_cache = {}
+        _hrr_cache = {}
+
+        def _vrr(e: tuple, f: tuple, m: int) -> list[float]:
+            # Primitive integrals [e0|f0]^(m), built by lowering e first and then f
+            _key = (e, f, m)
+            if _key in _vrr_cache:
+                return _vrr_cache[_key]
+            if sum(e) > 0:
+                _i  = next(_x for _x in range(3) if e[_x] > 0)
+                _e1 = _lower(e, _i)
+                _value = _PA[..., _i] * _vrr(_e1, f, m) + _WP[..., _i] * _vrr(_e1, f, m + 1)
+                if _e1[_i] > 0:
+                    _e2 = _lower(_e1, _i)
+                    _value = _value + _e1[_i] / (2 * _p) * (_vrr(_e2, f, m) - _rho / _p * _vrr(_e2, f, m + 1))
+                if f[_i] > 0:
+                    _value = _value + f[_i] / (2 * (_p + _q)) * _vrr(_e1, _lower(f, _i), m + 1)
+            elif sum(f) > 0:
+                _i  = next(_x for _x in range(3) if f[_x] > 0)
+                _f1 = _lower(f, _i)
+                _value = _QC[..., _i] * _vrr(e, _f1, m) + _WQ[..., _i] * _vrr(e, _f1, m + 1)
+                if _f1[_i] > 0:
+                    _f2 = _lower(_f1, _i)
+                    _value = _value + _f1[_i] / (2 * _q) * (_vrr(e, _f2, m) - _rho / _q * _vrr(e, _f2, m + 1))
+            else:
+                _value = _boys[m]
+            _vrr_cache[_key] = _value
+            return _value
+
+        def _hrr(a: tuple, b: tuple, c: tuple, d: tuple) -> float:
+            # Contracted integrals (ab|cd), built by transferring b to a and d to c
+            _key = (a, b, c, d)
+            if _key in _hrr_cache:
+                return _hrr_cache[_key]
+            if sum(b) > 0:
+                _i  = next(_x for _x in range(3) if b[_x] > 0)
+                _b1 = _lower(b, _i)
+                _value = _hrr(_raise(a, _i), _b1, c, d) + _AB[_i] * _hrr(a, _b1, c, d)
+            elif sum(d) > 0:
+                _i  = next(_x for _x in range(3) if d[_x] > 0)
+                _d1 = _lower(d, _i)
+                _value = _hrr(a, b, _raise(c, _i), _d1) + _CD[_i] * _hrr(a, b, c, _d1)
+            else:
+                _value = numpy.sum(_vrr(a, c, 0))
+            _hrr_cache[_key] = _value
+            return _value
+
+        return float(_hrr(_a, _b, _c, _d))
+
+class Rys(TwoElectronIntegral):
+    """
+    ERI engine based on Rys quadrature.
+
+    Every primitive integral is written as a sum over Rys roots of products of three one-dimensional (2D)
+    integrals Ix * Iy * Iz. The 2D integrals are built per Cartesian direction with the Rys recurrences,
+    vectorized over primitive quartets and roots, and the angular momentum is transferred to the second
+    centers in closed form. The roots and weights are interpolated from precomputed tables (see
+    `planck.src.integrals.rys`), so the cost grows only with the number of roots, (L + 2) / 2.
+    """
+    def quartet(self, bra: ShellPair, ket: ShellPair, dtype: type = numpy.float64) -> float:
+        """
+        Evaluates the contracted integral (ij|kl) with Rys quadrature.
+        """
+        _a, _b  = bra.first.shell, bra.second.shell
+        _c, _d  = ket.first.shell, ket.second.shell
+        _total  = int(sum(_a) + sum(_b) + sum(_c) + sum(_d))
+        _nroots = _total // 2 + 1
+        _data   = self._primitive_quartets(bra, ket)
+        _roots, _weights = rys_roots(_nroots, _data["argument"])
+
+        _p, _q, _pq = _data["p"][..., None], _data["q"][..., None], (_data["p"] + _data["q"])[..., None]
+        _B00 = (0.5 * _roots / _pq).astype(dtype, copy = False)
+        _B10 = (0.5 / _p * (1.0 - _q / _pq * _roots)).astype(dtype, copy = False)
+        _B01 = (0.5 / _q * (1.0 - _p / _pq * _roots)).astype(dtype, copy = False)
+        _AB  = bra.distance.astype(dtype, copy = False)
+        _CD  = ket.distance.astype(dtype, copy = False)
+
+        # Product of the three 2D integrals, accumulated per root
+        _integrand = (_weights * _data["prefactor"][..., None]).astype(dtype, copy = False)
+        for _i in range(3):
+            _C00  = ((_data["P"] - bra.first.center)[..., _i, None] + (_data["W"] - _data["P"])[..., _i, None] * _roots).astype(dtype, copy = False)
+            _C00p = ((_data["Q"] - ket.first.center)[..., _i, None] + (_data["W"] - _data["Q"])[..., _i, None] * _roots).astype(dtype, copy = False)
+            _integrand = _integrand * self._integral_2d(_a[_i], _b[_i], _c[_i], _d[_i], _C00, _C00p, _B00, _B10, _B01, _AB[_i], _CD[_i])
+        return float(numpy.sum(_integrand))
+
+    def cartesian_block(self, I: int, J: int, K: int, L: int, dtype: type = numpy.float64) -> list[list[list[list[float]]]]:
+        """
+        Evaluates the integrals over the Cartesian functions of four shell blocks at once, see `_rys_blocks`.
+        """
+        return _rys_blocks(self, [(I, J, K, L)], dtype)[0]
+
+    @staticmethod
+    def _integral_2d(a: int, b: int, c: int, d: int, C00: list[float], C00p: list[float], B00: list[float], B10: list[float], B01: list[float], AB: float, CD: float) -> list[float]:
+        """
+        Evaluates the 2D integral I(a, b, c, d) along one Cartesian direction for every primitive quartet and root.
+
+        The integrals G(n, m) with the angular momentum on the first centers follow from the Rys recurrences
+            G(n + 1, 0) = C00 G(n, 0) + n B10 G(n - 1, 0)
+            G(n, m + 1) = C00' G(n, m) + m B01 G(n, m - 1) + n B00 G(n - 1, m)
+        and are shifted to the second centers through the binomial expansion of (x - B)^b and (x - D)^d.
+        """
+        _nmax, _mmax = a + b, c + d
+        _G = [[None] * (_mmax + 1) for _ in range(_nmax + 1)]
+        _G[0][0] = numpy.ones_like(C00)
+        for _n in range(_nmax):
+            _G[_n + 1][0] = C00 * _G[_n][0] + (_n * B10 * _G[_n - 1][0] if _n > 0 else 0.0)
+        for _m in range(_mmax):
+            for _n in range(_nmax + 1):
+                _value = C00p * _G[_n][_m]
+                if _m > 0:
+                    _value = _value + _m * B01 * _G[_n][_m - 1]
+                if _n > 0:
+                    _value = _value + _n * B00 * _G[_n - 1][_m]
+                _G[_n][_m + 1] = _value
+
+        _result = 0.0
+        for _k in range(b + 1):
+            for _l in range(d + 1):
+                _result = _result + math.comb(b, _k) * pow(AB, b - _k) * math.comb(d, _l) * pow(CD, d - _l) * _G[a + _k][c + _l]
+        return _result
+
+class ERI(TwoElectronIntegral):
+    """
+    ERI dispatcher that picks the cheaper engine for every quartet.
+
+    The choice is made per angular momentum class, from a cost model that counts the vector operations of
+    the Obara-Saika and Rys engines and weighs them with the number of primitive quartets. Alternatively,
+    `calibrate` times both engines on one quartet of every class present in the basis and stores the
+    faster one, which then takes precedence over the model.
+
+    Attributes:
+    -----------
+        engines (dict[str, TwoElectronIntegral]): The available engines, keyed by name.
+        engine (str): Either "auto" for automatic selection, or the name of the engine to always use.
+        calibration (dict[tuple, str]): The engine chosen by `calibrate` for every angular momentum class.
+    """
+    def __init__(self, basis: list[Shell], spherical: bool = False, threshold: float = 1e-14, engine: str = "auto") -> None:
+        super().__init__(basis, spherical, threshold)
+        self.engines     = {"obara-saika": ObaraSaika(basis, spherical, threshold), "rys": Rys(basis, spherical, threshold)}
+        self.engine      = engine
+        self.calibration = {}
+        self._selection  = {}
+        if engine != "auto" and engine not in self.engines:
+            raise ValueError(f"Unknown ERI engine {engine}. Please choose one of auto, {', '.join(self.engines)}.")
+
+    def quartet(self, bra: ShellPair, ket: ShellPair, dtype: type = numpy.float64) -> float:
+        """
+        Evaluates the contracted integral (ij|kl) with the engine selected for its class.
+        """
+        return self.engines[self.select(bra, ket)].quartet(bra, ket, dtype)
+
+    def cartesian_block(self, I: int, J: int, K: int, L: int, dtype: type = numpy.float64) -> list[list[list[list[float]]]]:
+        """
+        Evaluates the integrals over the Cartesian functions of four shell blocks with the engine selected for their class.
+
+        All function quartets of a block quartet belong to the same class. Blocks assigned to Rys quadrature, and all
+        blocks evaluated in single precision, are computed at once by `_rys_blocks`, since only the batched kernel runs
+        on arrays large enough to gain from the narrower type.
+        """
+        _first = [self.basis[self.blocks[_X][0]] for _X in (I, J, K, L)]
+        _class = tuple(_shell.type.value for _shell in _first)
+        if dtype == numpy.float64 and self.choose(_class, _first[0].exponents.size * _first[1].exponents.size * _first[2].exponents.size * _first[3].exponents.size) != "rys":
+            return super().cartesian_block(I, J, K, L, dtype)
+        return _rys_blocks(self, [(I, J, K, L)], dtype)[0]
+
+    def select(self, bra: ShellPair, ket: ShellPair) -> str:
+        """
+        Returns the name of the engine used for a quartet.
+        """
+        return self.choose(bra.momentum + ket.momentum, bra.exponents.size * ket.exponents.size)
+
+    def choose(self, momentum: tuple[int, int, int, int], nprims: int) -> str:
+        """
+        Returns the name of the engine used for an angular momentum class (la, lb, lc, ld) with `nprims` primitive quartets.
+        """
+        if self.engine != "auto":
+            return self.engine
+        if momentum in self.calibration:
+            return self.calibration[momentum]
+
+        _key = momentum + (nprims,)
+        if _key not in self._selection:
+            _costs = class_costs(*_key)
+            self._selection[_key] = min(_costs, key = _costs.get)
+        return self._selection[_key]
+
+    def calibrate(self, repeats: int = 3) -> dict:
+        """
+        Times both engines on one quartet of every angular momentum class and keeps the faster one.
+
+        Args:
+        -----
+            repeats (int): The number of timed evaluations per engine, the best of which is used.
+
+        Returns:
+        --------
+            dict: The selected engine for every class (la, lb, lc, ld).
+        """
+        if not self.shellpairs:
+            self.create_shellpairs()
+            self.sort_shellpairs()
+
+        # Pick one representative quartet per class
+        _samples = {}
+        for _index, _bra in enumerate(self.shellpairs):
+            for _ket in self.shellpairs[:_index + 1]:
+                _samples.setdefault(_bra.momentum + _ket.momentum, (_bra, _ket))
+
+        for _class, (_bra, _ket) in _samples.items():
+            _timings = {}
+            for _name, _engine in self.engines.items():
+                _timings[_name] = math.inf
+                for _ in range(repeats):
+                    _start = time.perf_counter()
+                    _engine.quartet(_bra, _ket)
+                    _timings[_name] = min(_timings[_name], time.perf_counter() - _start)
+            self.calibration[_class] = min(_timings, key = _timings.get)
+        return self.calibration
+
+def load_engine(name: str) -> type:
+    """
+    Returns the class of an optional integral engine, importing its module on first use.
+
+    The engines are not imported with the driver, so calculations that do not use them do not pay for loading them.
+
+    Args:
+    -----
+        name (str): The name of the engine, one of the keys of `ENGINES`.
+
+    Returns:
+    --------
+        type: The engine class, which is constructed from the integral driver.
+    """
+    _module, _class = ENGINES[name]
+    return getattr(importlib.import_module(f"planck.src.integrals.{_module}"), _class)
+
+def _rys_blocks(driver: TwoElectronIntegral, quartets: list[tuple[int, int, int, int]], dtype: type = numpy.float64) -> list[list[list[list[list[float]]]]]:
+    """
+    Evaluates the integrals over the Cartesian functions of block quartets of one class with Rys quadrature, all at once.
+
+    The functions of a shell block share their center, exponents and total angular momentum, so the primitive quartets,
+    the Rys roots and the 2D integrals I(a, b, c, d) for all Cartesian exponents up to the angular momenta of the blocks
+    are computed once per block quartet, and vectorized over all block quartets. The integral of every function quartet
+    is then the sum over primitives and roots of the product of three 2D integrals gathered by its Cartesian exponents,
+    weighted by the contraction coefficients of its functions. All steps run on whole arrays in the floating point type
+    `dtype`, except the roots and weights, which are always evaluated in double precision.
+
+    Args:
+    -----
+        driver (TwoElectronIntegral): The integral driver holding the basis, the blocks and the significant shell pairs.
+        quartets (list[tuple[int, int, int, int]]): The block quartets, which must agree in the angular momenta, the
+            number of functions and the number of primitives of their four blocks.
+        dtype (type): The floating point type in which the integrals are evaluated.
+
+    Returns:
+    --------
+        numpy.ndarray: The integrals with shape (nquartets, nI, nJ, nK, nL) and type `dtype`.
+    """
+    _shells  = [[driver.basis[_index] for _index in driver.blocks[_X]] for _X in quartets[0]]
+    _shape   = tuple(len(_block) for _block in _shells)
+    _momenta = [_block[0].type.value for _block in _shells]
+    _blocks  = numpy.asarray(quartets, dtype = int).reshape(-1, 4)
+
+    # The bra and ket data is evaluated once per distinct block pair of the batch and gathered for every block quartet
+    _sides = []
+    for _side in (0, 2):
+        _unique = {}
+        _index  = numpy.array([_unique.setdefault(tuple(_quartet[_side:_side + 2]), len(_unique)) for _quartet in quartets])
+        _data   = [_block_pair(driver, *_pair) for _pair in _unique]
+        _sides.append([numpy.array([_entry[_n] for _entry in _data])[_index] for _n in range(5)])
+    _significant = _sides[0][0] & _sides[1][0]
+
+    # Primitive quartets of every block quartet, with shape (nquartets, nbra, nket)
+    _p   = _sides[0][1][:, :, None]
+    _q   = _sides[1][1][:, None, :]
+    _P   = _sides[0][2][:, :, None, :]
+    _Q   = _sides[1][2][:, None, :, :]
+    _pq  = _p + _q
+    _W   = (_p[..., None] * _P + _q[..., None] * _Q) / _pq[..., None]
+    _roots, _weights = rys_roots(sum(_momenta) // 2 + 1, _p * _q / _pq * numpy.sum((_P - _Q)**2, axis = -1))
+
+    _p, _q, _pq = _p[..., None], _q[..., None], _pq[..., None]
+    _B00 = (0.5 * _roots / _pq).astype(dtype, copy = False)
+    _B10 = (0.5 / _p * (1.0 - _q / _pq * _roots)).astype(dtype, copy = False)
+    _B01 = (0.5 / _q * (1.0 - _p / _pq * _roots)).astype(dtype, copy = False)
+    _common = (_weights * 2 * pow(numpy.pi, 2.5) / (_p * _q * numpy.sqrt(_pq))).astype(dtype, copy = False)
+
+    # Contraction weights of every function pair of the bra and of the ket, with shape (nquartets, n1, n2, nprims)
+    _pairweights = [_sides[0][4].astype(dtype, copy = False), _sides[1][4].astype(dtype, copy = False)]
+
+    # 2D integrals I(a, b, c, d) of every direction, with shape (la + 1, lb + 1, lc + 1, ld + 1, nquartets, nbra, nket, nroots)
+    _centers = numpy.array([driver.basis[_block[0]].center for _block in driver.blocks])
+    _A  = _centers[_blocks[:, 0]][:, None, None, :]
+    _C  = _centers[_blocks[:, 2]][:, None, None, :]
+    _AB = _sides[0][3]
+    _CD = _sides[1][3]
+    _tables = []
+    for _x in range(3):
+        _C00  = ((_P - _A)[..., _x, None] + (_W - _P)[..., _x, None] * _roots).astype(dtype, copy = False)
+        _C00p = ((_Q - _C)[..., _x, None] + (_W - _Q)[..., _x, None] * _roots).astype(dtype, copy = False)
+        _tables.append(_integrals_2d(*_momenta, _C00, _C00p, _B00, _B10, _B01, _AB[:, _x], _CD[:, _x], dtype))
+
+    # Gather the 2D integrals of every function quartet, one bra function at a time to bound the memory
+    _powers = [numpy.array([_shell.shell for _shell in _block]) for _block in _shells]
+    _values = numpy.empty((len(quartets),) + _shape, dtype = dtype)
+    for _a in range(_shape[0]):
+        _integrand = _common
+        for _x in range(3):
+            _integrand = _integrand * _tables[_x][_powers[0][_a, _x], _powers[1][:, _x, None, None], _powers[2][None, :, _x, None], _powers[3][None, None, :, _x]]
+        _values[:, _a] = numpy.einsum("qjb,qklc,jklqbcr->qjkl", _pairweights[0][:, _a], _pairweights[1], _integrand, optimize = True)
+    _values[~_significant] = 0.0
+    return _values
+
+def _block_pair(driver: TwoElectronIntegral, I: int, J: int) -> tuple:
+    """
+    Collects the data shared by all function pairs of two shell blocks, for `_rys_blocks`.
+
+    Args:
+    -----
+        driver (TwoElectronIntegral): The integral driver.
+        I, J (int): The indices of the shell blocks.
+
+    Returns:
+    --------
+        tuple: Whether the pair is significant, the combined exponents with shape (nprims,), the product centers with shape
+               (nprims, 3), the distance A - B and the contraction weights of every function pair, with shape (nI, nJ, nprims).
+    """
+    _one, _two = [driver.basis[_index] for _index in driver.blocks[I]], [driver.basis[_index] for _index in driver.blocks[J]]
+    _i, _j     = _one[0].basisindex, _two[0].basisindex
+    _exponents, _centers, _prefactors = maths.gaussian_products(_one[0].center, _one[0].exponents, _two[0].center, _two[0].exponents)
+    _w1 = numpy.array([_shell.coefficients * _shell.normcoeffs for _shell in _one])
+    _w2 = numpy.array([_shell.coefficients * _shell.normcoeffs for _shell in _two])
+    _weights = numpy.einsum("ix,jy,xy->ijxy", _w1, _w2, _prefactors).reshape(len(_one), len(_two), -1)
+    return (max(_i, _j), min(_i, _j)) in driver.pairs, _exponents.ravel(), _centers.reshape(-1, 3), _one[0].center - _two[0].center, _weights
+
+def _integrals_2d(la: int, lb: int, lc: int, ld: int, C00: list[float], C00p: list[float], B00: list[float], B10: list[float], B01: list[float],
+                  AB: list[float], CD: list[float], dtype: type = numpy.float64) -> list[float]:
+    """
+    Evaluates the 2D integrals I(a, b, c, d) along one Cartesian direction for all a <= la, b <= lb, c <= lc, d <= ld.
+
+    The integrals G(n, m) follow from the Rys recurrences of `Rys._integral_2d`, vectorized over n, and are shifted
+    to the second centers by contracting them with the binomial expansions of (x - B)^b and (x - D)^d.
+
+    Args:
+    -----
+        la, lb, lc, ld (int): The angular momenta of the four blocks.
+        C00, C00p, B00, B10, B01 (numpy.ndarray): The coefficients of the Rys recurrences, with shape (nquartets, nbra, nket, nroots).
+        AB, CD (numpy.ndarray): The distances A - B and C - D along the direction, one per block quartet.
+        dtype (type): The floating point type in which the integrals are evaluated.
+
+    Returns:
+    --------
+        numpy.ndarray: The integrals with shape (la + 1, lb + 1, lc + 1, ld + 1, *C00.shape).
+    """
+    _nmax, _mmax = la + lb, lc + ld
+    _factors = numpy.arange(_nmax + 1, dtype = dtype).reshape((-1,) + (1,) * C00.ndim)
+    _G = numpy.zeros((_nmax + 1, _mmax + 1) + C00.shape, dtype = dtype)
+    _G[0, 0] = 1.0
+    for _n in range(_nmax):
+        _G[_n + 1, 0] = C00 * _G[_n, 0] + (_n * B10 * _G[_n - 1, 0] if _n > 0 else 0.0)
+    for _m in range(_mmax):
+        _G[:, _m + 1] = C00p * _G[:, _m]
+        if _m > 0:
+            _G[:, _m + 1] += _m * B01 * _G[:, _m - 1]
+        _G[1:, _m + 1] += _factors[1:] * B00 * _G[:-1, _m]
+
+    # Transfer coefficients T[q, a, b, a + k] = C(b, k) (A - B)^(b - k) of every block quartet q, and likewise for the ket
+    _bra = numpy.zeros((AB.size, la + 1, lb + 1, _nmax + 1), dtype = dtype)
+    _ket = numpy.zeros((CD.size, lc + 1, ld + 1, _mmax + 1), dtype = dtype)
+    for _a in range(la + 1):
+        for _b in range(lb + 1):
+            for _k in range(_b + 1):
+                _bra[:, _a, _b, _a + _k] = math.comb(_b, _k) * pow(AB, _b - _k)
+    for _c in range(lc + 1):
+        for _d in range(ld + 1):
+            for _l in range(_d + 1):
+                _ket[:, _c, _d, _c + _l] = math.comb(_d, _l) * pow(CD, _d - _l)
+    return numpy.einsum("qabn,qcdm,nmq...->abcdq...", _bra, _ket, _G, optimize = True)
+
+def class_costs(la: int, lb: int, lc: int, ld: int, nprims: int) -> dict[str, float]:
+    """
+    Estimates the cost of both engines for one quartet of an angular momentum class.
+
+    The recurrences are counted for one representative component, the one with all angular momentum along x,
+    so that the engine is chosen once per class and not for every Cartesian component.
+
+    Args:
+    -----
+        la, lb, lc, ld (int): The angular momenta of the four functions.
+        nprims (int): The number of primitive quartets.
+
+    Returns:
+    --------
+        dict[str, float]: The estimated cost of every engine, keyed by its name.
+    """
+    _a, _b, _c, _d = ((_l, 0, 0) for _l in (la, lb, lc, ld))
+    return {"obara-saika": _cost_obara_saika(_a, _b, _c, _d, nprims), "rys": _cost_rys(_a, _b, _c, _d, nprims)}
+
+def _lower(index: tuple, direction: int) -> tuple:
+    """
+    Returns the Cartesian exponents with the component along `direction` lowered by one.
+    """
+    return tuple(_value - 1 if _x == direction else _value for _x, _value in enumerate(index))
+
+def _raise(index: tuple, direction: int) -> tuple:
+    """
+    Returns the Cartesian exponents with the component along `direction` raised by one.
+    """
+    return tuple(_value + 1 if _x == direction else _value for _x, _value in enumerate(index))
+
+def _cost_obara_saika(a: tuple, b: tuple, c: tuple, d: tuple, nprims: int) -> float:
+    """
+    Estimates the cost of the Obara-Saika engine for a quartet by counting the nodes of its recurrences.
+    """
+    _total = sum(a) + sum(b) + sum(c) + sum(d)
+    _vrr, _hrr = set(), set()
+
+    def _count_vrr(e: tuple, f: tuple, m: int) -> None:
+        if (e, f, m) in _vrr:
+            return
+        _vrr.add((e, f, m))
+        if sum(e) > 0:
+            _i  = next(_x for _x in range(3) if e[_x] > 0)
+            _e1 = _lower(e, _i)
+            _count_vrr(_e1, f, m)
+            _count_vrr(_e1, f, m + 1)
+            if _e1[_i] > 0:
+                _count_vrr(_lower(_e1, _i), f, m)
+                _count_vrr(_lower(_e1, _i), f, m + 1)
+            if f[_i] > 0:
+                _count_vrr(_e1, _lower(f, _i), m + 1)
+        elif sum(f) > 0:
+            _i  = next(_x for _x in range(3) if f[_x] > 0)
+            _f1 = _lower(f, _i)
+            _count_vrr(e, _f1, m)
+            _count_vrr(e, _f1, m + 1)
+            if _f1[_i] > 0:
+                _count_vrr(e, _lower(_f1, _i), m)
+                _count_vrr(e, _lower(_f1, _i), m + 1)
+
+    def _count_hrr(a: tuple, b: tuple, c: tuple, d: tuple) -> None:
+        if (a, b, c, d) in _hrr:
+            return
+        _hrr.add((a, b, c, d))
+        if sum(b) > 0:
+            _i = next(_x for _x in range(3) if b[_x] > 0)
+            _count_hrr(_raise(a, _i), _lower(b, _i), c, d)
+            _count_hrr(a, _lower(b, _i), c, d)
+        elif sum(d) > 0:
+            _i = next(_x for _x in range(3) if d[_x] > 0)
+            _count_hrr(a, b, _raise(c, _i), _lower(d, _i))
+            _count_hrr(a, b, c, _lower(d, _i))
+        else:
+            _count_vrr(a, c, 0)
+
+    _count_hrr(a, b, c, d)
+    return 4 * len(_vrr) * (VECTOR_OVERHEAD + nprims) + len(_hrr) * VECTOR_OVERHEAD + BOYS_COST * (VECTOR_OVERHEAD + nprims * (_total + 1))
+
+def _cost_rys(a: tuple, b: tuple, c: tuple, d: tuple, nprims: int) -> float:
+    """
+    Estimates the cost of the Rys engine for a quartet by counting the 2D integrals and the transfer terms.
+    """
+    _nroots = (sum(a) + sum(b) + sum(c) + sum(d)) // 2 + 1
+    _nodes  = sum(3 * (a[_i] + b[_i] + 1) * (c[_i] + d[_i] + 1) + (b[_i] + 1) * (d[_i] + 1) for _i in range(3))
+    return (_nodes + ROOTS_COST) * (VECTOR_OVERHEAD + nprims * _nroots)
@@ -1,7 +1,5 @@
 import os
 import typing
-import xml.dom.minidom
-import xml.etree.ElementTree
 
 def write_checkpoint(fchk: str, content: typing.Union[list[float], list[list[float]]], header: str) -> None:
     """
@@ -23,6 +21,10 @@ def write_checkpoint(fchk: str, content: typing.Union[list[float], list[list[flo
     --------
     None: This function does not return a value. It modifies the XML structure and writes it back to the file.
     """
+    # The XML stack is only needed when a checkpoint is written, so it is not loaded with the package
+    import xml.dom.minidom
+    import xml.etree.ElementTree
+
     if not os.path.exists(fchk):
         _root_element = xml.etree.ElementTree.Element("checkpoint")
         _geom_element = xml.etree.ElementTree.SubElement("geometry")
@@ -0,0 +1,295 @@
+#  Planck
+#  Copyright (C) 2024 Hemanth Haridas, University of Utah
+#  Contact: hemanthhari23@gmail.com
+#
+#  This program is free software: you can redistribute it and/or modify it under
+#  the terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or a later version.
+#
+#  This program is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A
+#  PARTICULAR PURPOSE.  See the GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with
+#  this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import importlib
+import json
+import multiprocessing
+import os
+import pkgutil
+import signal
+import time
+import typing
+
+# The calculators a job can request, keyed by method name, as (module, class). They are imported by `warm_up`,
+# so that clients submitting jobs do not load the calculation stack.
+METHODS = {"rhf": ("planck.src.calculators.hf.restricted", "RHF"), "mp2": ("planck.src.calculators.mp2.restricted", "RMP2")}
+
+# The coordinate formats a job can use, keyed by name, as (module, class)
+COORDINATES = {"cartesian": ("planck.src.geometry.cartesian", "Molecule"), "zmatrix": ("planck.src.geometry.zmatrix", "Molecule")}
+
+# The calculator options a job may set. Options that touch server resources, such as the memory and disk budgets
+# or the scratch directory, are fixed by the server.
+OPTIONS = {"spherical", "max_iterations", "energy_convergence", "error_convergence", "diis_size", "mixed_precision", "precision_switch",
+           "multipole", "multipole_order", "multipole_separation", "solver", "stall_window", "cholesky", "frozen_core"}
+
+# Results of recent jobs in this worker, keyed by the canonical job
+_results = collections.OrderedDict()
+_cache_size = 0
+
+def warm_up(nroots: int = 4, cache_size: int = 256) -> None:
+    """
+    Loads everything a calculation needs before the first job arrives.
+
+    Imports the calculators and every tabulated basis set module, loads the Boys function table and builds the
+    Rys quadrature tables for up to `nroots` roots. Called in the server before the workers are forked, the work is shared with all
+    workers through copy-on-write, and again in every worker to set up its result cache.
+
+    Args:
+    -----
+        nroots (int): The largest number of Rys roots whose tables are built.
+        cache_size (int): The number of results kept per worker for repeated jobs.
+    """
+    global _cache_size
+    _cache_size = cache_size
+    _package = importlib.import_module("planck.src.basis")
+    for _module in pkgutil.iter_modules(_package.__path__):
+        if _module.name not in ("base", "spherical"):
+            importlib.import_module(f"planck.src.basis.{_module.name}")
+    for _module, _ in list(METHODS.values()) + list(COORDINATES.values()):
+        importlib.import_module(_module)
+    importlib.import_module("planck.src.helpers.maths")._boys_table()
+    for _nroots in range(1, nroots + 1):
+        importlib.import_module("planck.src.integrals.rys")._rys_table(_nroots)
+
+def _load(entry: tuple[str, str]) -> type:
+    """
+    Returns the class named by a (module, class) entry of `METHODS` or `COORDINATES`.
+    """
+    return getattr(importlib.import_module(entry[0]), entry[1])
+
+def run_job(job: dict) -> dict:
+    """
+    Runs one calculation in a worker.
+
+    A job is a dictionary with the keys
+        "geometry": the structure in the format of `Molecule.geometry`,
+        "method": "rhf" or "mp2",
+        "basis": the basis set name for all elements, or a dictionary per element,
+        "coordinates": "cartesian" (default) or "zmatrix",
+        "options": further keyword arguments of the calculator, restricted to `OPTIONS` (optional),
+        "id": an identifier returned with the result (optional).
+
+    Args:
+    -----
+        job (dict): The job description.
+
+    Returns:
+    --------
+        dict: The result with the job id, "status" ("ok" or "error"), and either the energy, the number of
+            iterations and the convergence flag, or the error message. The elapsed time is always included.
+    """
+    _start = time.perf_counter()
+    _key   = json.dumps({_k: _v for _k, _v in job.items() if _k != "id"}, sort_keys = True)
+    if _key in _results:
+        _results.move_to_end(_key)
+        return dict(_results[_key], id = job.get("id"), elapsed = time.perf_counter() - _start, cached = True)
+
+    try:
+        _molecule = _load(COORDINATES[job.get("coordinates", "cartesian").lower()])()
+        _molecule.geometry(job["geometry"])
+        _basis = job["basis"] if isinstance(job["basis"], dict) else {_atom: job["basis"] for _atom in set(_molecule.atoms)}
+
+        _calculation = _load(METHODS[job.get("method", "rhf").lower()])()
+        _options = job.get("options", {})
+        if set(_options) - OPTIONS:
+            raise ValueError(f"Options not allowed on the server: {', '.join(sorted(set(_options) - OPTIONS))}")
+        _calculation.calculator(_molecule, _basis, **_options)
+        _reference = getattr(_calculation, "reference", _calculation)
+        _result = {"status": "ok", "energy": float(_calculation.energy), "iterations": int(_reference.iterations), "converged": bool(_reference.converged)}
+    except Exception as _error:
+        return {"id": job.get("id"), "status": "error", "error": f"{type(_error).__name__}: {_error}", "elapsed": time.perf_counter() - _start}
+
+    _results[_key] = _result
+    if len(_results) > _cache_size:
+        _results.popitem(last = False)
+    return dict(_result, id = job.get("id"), elapsed = time.perf_counter() - _start, cached = False)
+
+class CalculationServer:
+    """
+    Persistent calculation server on a Unix socket.
+
+    Clients send jobs as JSON objects, one per line (see `run_job`), and receive one JSON result per line as
+    soon as the job finishes, so the results of a connection may arrive in a different order than the jobs.
+    The asyncio front-end only parses and dispatches; the calculations run in a pool of worker processes that
+    are forked once at startup from the warmed-up server, so basis sets, Boys and Rys tables and the imported
+    modules are ready in every worker.
+
+    Attributes:
+    -----------
+        path (str): The path of the Unix socket.
+        workers (int): The number of worker processes.
+        pool (concurrent.futures.ProcessPoolExecutor): The worker pool, created by `serve` and re-created from the
+            warmed-up server whenever a worker dies.
+    """
+    def __init__(self, path: str, workers: typing.Optional[int] = None, nroots: int = 4, cache_size: int = 256) -> None:
+        self.path       = path
+        self.workers    = workers or os.cpu_count() or 1
+        self.nroots     = nroots
+        self.cache_size = cache_size
+        self.pool       = None
+
+    async def serve(self) -> None:
+        """
+        Warms up, forks the worker pool and serves clients until SIGINT or SIGTERM is received.
+
+        A socket file left behind by a server that is gone is replaced, but a socket on which another server is
+        still listening is not taken over.
+        """
+        if os.path.exists(self.path):
+            try:
+                _, _writer = await asyncio.open_unix_connection(self.path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            else:
+                _writer.close()
+                await _writer.wait_closed()
+                raise RuntimeError(f"Another server is already listening on {self.path}")
+
+        warm_up(self.nroots, self.cache_size)
+        _loop = asyncio.get_running_loop()
+        await self._start_pool()
+
+        _stop   = asyncio.Event()
+        for _signal in (signal.SIGINT, signal.SIGTERM):
+            _loop.add_signal_handler(_signal, _stop.set)
+        # Only the user running the server may connect, since jobs run with its permissions
+        _umask  = os.umask(0o177)
+        try:
+            _server = await asyncio.start_unix_server(self._handle, path = self.path)
+        finally:
+            os.umask(_umask)
+        os.chmod(self.path, 0o600)
+        try:
+            async with _server:
+                await _stop.wait()
+        finally:
+            self.pool.shutdown(cancel_futures = True)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _start_pool(self) -> None:
+        """
+        Forks the worker pool from the warmed-up server and waits until all workers are running.
+        """
+        self.pool = concurrent.futures.ProcessPoolExecutor(self.workers, mp_context = multiprocessing.get_context("fork"),
+                                                           initializer = warm_up, initargs = (self.nroots, self.cache_size))
+
+        # With the fork context, the first submission starts all workers at once
+        await asyncio.get_running_loop().run_in_executor(self.pool, time.sleep, 0.0)
+
+    async def _restart_pool(self, broken: concurrent.futures.ProcessPoolExecutor) -> None:
+        """
+        Replaces a pool that became unusable because a worker died, unless another job already replaced it.
+        """
+        if self.pool is broken:
+            broken.shutdown(wait = False, cancel_futures = True)
+            await self._start_pool()
+
+    async def _run(self, job: dict) -> dict:
+        """
+        Runs one job in the worker pool.
+
+        If a worker dies, the pool is broken for all later jobs, so it is re-created. The jobs that were running
+        in the broken pool are reported as failed, while a job that could not even be submitted to it is retried
+        in the new pool.
+        """
+        _loop = asyncio.get_running_loop()
+        _pool = self.pool
+        try:
+            _future = _loop.run_in_executor(_pool, run_job, job)
+        except concurrent.futures.process.BrokenProcessPool:
+            await self._restart_pool(_pool)
+            _pool   = self.pool
+            _future = _loop.run_in_executor(_pool, run_job, job)
+        try:
+            return await _future
+        except concurrent.futures.process.BrokenProcessPool as _error:
+            await self._restart_pool(_pool)
+            return {"id": job.get("id"), "status": "error", "error": f"{type(_error).__name__}: a worker died while running the job"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves one client connection, dispatching every job line to the worker pool.
+        """
+        _lock  = asyncio.Lock()
+        _tasks = set()
+
+        async def _dispatch(line: bytes) -> None:
+            _job = {}
+            try:
+                _job    = json.loads(line)
+                _result = await self._run(_job)
+            except Exception as _error:
+                _result = {"id": _job.get("id") if isinstance(_job, dict) else None, "status": "error", "error": f"{type(_error).__name__}: {_error}"}
+            async with _lock:
+                writer.write(json.dumps(_result).encode() + b"\n")
+                await writer.drain()
+
+        while _line := await reader.readline():
+            if _line.strip():
+                _task = asyncio.create_task(_dispatch(_line))
+                _tasks.add(_task)
+                _task.add_done_callback(_tasks.discard)
+        if _tasks:
+            await asyncio.gather(*_tasks)
+        writer.close()
+        await writer.wait_closed()
+
+async def submit(path: str, jobs: list[dict]) -> list[dict]:
+    """
+    Submits jobs to a running server over one connection and collects their results.
+
+    Args:
+    -----
+        path (str): The path of the server socket.
+        jobs (list[dict]): The jobs, see `run_job`. Their ids are replaced by their positions.
+
+    Returns:
+    --------
+        list[dict]: The results in the order of the jobs.
+    """
+    _reader, _writer = await asyncio.open_unix_connection(path)
+    for _index, _job in enumerate(jobs):
+        _writer.write(json.dumps(dict(_job, id = _index)).encode() + b"\n")
+    await _writer.drain()
+    _writer.write_eof()
+
+    _results = [None] * len(jobs)
+    for _ in jobs:
+        _result = json.loads(await _reader.readline())
+        _results[_result["id"]] = _result
+    _writer.close()
+    await _writer.wait_closed()
+    return _results
+
+def main() -> None:
+    """
+    Starts a calculation server from the command line.
+    """
+    _parser = argparse.ArgumentParser(description = "Persistent planck calculation server on a Unix socket.")
+    _parser.add_argument("--socket", default = "/tmp/planck.sock", help = "The path of the Unix socket.")
+    _parser.add_argument("--workers", type = int, default = None, help = "The number of worker processes, by default the number of CPUs.")
+    _parser.add_argument("--roots", type = int, default = 4, help = "The largest number of Rys roots tabulated at startup.")
+    _parser.add_argument("--cache", type = int, default = 256, help = "The number of results cached per worker.")
+    _arguments = _parser.parse_args()
+    asyncio.run(CalculationServer(_arguments.socket, _arguments.workers, _arguments.roots, _arguments.cache).serve())
+
+if __name__ == "__main__":
+    main()